@@ -683,6 +683,9 @@ app.on('window-all-closed', function () {
 app.on('before-quit', (event) => {
   console.log('App is about to quit, cleaning up...');
   
+  // Let the resident Python bridge finish any in-flight write and exit cleanly
+  stopBridgeDaemon();
+  
   // Force close any lingering processes
   if (mainWindow && !mainWindow.isDestroyed()) {
     mainWindow.destroy();
@@ -997,30 +1000,227 @@ ipcMain.handle('get-ui-source', async () => {
 // Python Integration Handlers
 const { spawn } = require('child_process');
 
+// Resolve the electron_bridge.py that sits next to the Python executable
+function getBridgeScriptPath(pythonExePath) {
+  if (pythonExePath !== 'python3') {
+    // Determine script path based on platform and python executable location
+    let runtimeDir;
+    
+    if (os.platform() === 'win32') {
+      // On Windows, python.exe is directly in the runtime directory
+      runtimeDir = path.dirname(pythonExePath);
+    } else {
+      // On macOS, python3 is in bin/ subdirectory
+      runtimeDir = path.dirname(path.dirname(pythonExePath)); // Remove /bin/python3 to get runtime dir
+    }
+    
+    return path.join(runtimeDir, 'electron_bridge.py');
+  }
+  
+  // Development fallback
+  return path.join(__dirname, 'python', 'electron_bridge.py');
+}
+
+// Determine the best working directory for the Python bridge
+function getBridgeWorkingDir() {
+  // In packaged apps, __dirname is inside app.asar and not accessible
+  // Use the app's main directory instead
+  if (process.resourcesPath && __dirname.includes('app.asar')) {
+    // Use the app bundle's main directory (one level up from Resources)
+    return path.dirname(process.resourcesPath);
+  }
+  return __dirname;
+}
+
+// Resident Python bridge ("electron_bridge.py serve")
+// One interpreter stays alive for the whole session and answers newline-delimited
+// JSON-RPC requests, so each command only pays for its own work instead of
+// interpreter start-up and openpyxl imports. Requests carry an id, so several can
+// be in flight at once; responses are matched back to their callers by id.
+const BRIDGE_DAEMON_MAX_RESTARTS = 3;
+
+const bridgeDaemon = {
+  process: null,
+  buffer: '',
+  nextId: 1,
+  pending: new Map(),
+  restarts: 0,
+  disabled: false
+};
+
+// Returns whether the line was a protocol message (a response or notification)
+function handleBridgeDaemonLine(line) {
+  let message;
+  try {
+    message = JSON.parse(line);
+  } catch (e) {
+    // Anything that isn't a protocol message (e.g. pip output) is just logged
+    console.log('Python bridge (serve) output:', line);
+    return false;
+  }
+
+  if (message.method) {
+    // Partial result streamed ahead of its request's response (e.g. cohort_result)
+    console.log(`Python bridge (serve) ${message.method} for request ${message.params && message.params.request_id}`);
+    return true;
+  }
+
+  const pending = bridgeDaemon.pending.get(message.id);
+  if (!pending) {
+    console.warn('Python bridge (serve) response with unknown id:', line);
+    return true;
+  }
+  bridgeDaemon.pending.delete(message.id);
+  
+  if (message.error) {
+    pending.resolve({ success: false, error: message.error.message, stdout: line });
+  } else {
+    pending.resolve({ success: true, data: message.result });
+  }
+  return true;
+}
+
+function startBridgeDaemon() {
+  const pythonExePath = getEmbeddedPythonPath();
+  const pythonScriptPath = getBridgeScriptPath(pythonExePath);
+  
+  console.log('Starting resident Python bridge:', pythonExePath, pythonScriptPath);
+  
+  const child = spawn(pythonExePath, [pythonScriptPath, 'serve'], {
+    stdio: ['pipe', 'pipe', 'pipe'],
+    cwd: getBridgeWorkingDir()
+  });
+  
+  bridgeDaemon.process = child;
+  bridgeDaemon.buffer = '';
+  // Until the bridge has answered something it has not started on any request
+  let answered = false;
+  
+  child.stdout.on('data', (chunk) => {
+    bridgeDaemon.buffer += chunk.toString();
+    let newline;
+    while ((newline = bridgeDaemon.buffer.indexOf('\n')) !== -1) {
+      const line = bridgeDaemon.buffer.slice(0, newline).trim();
+      bridgeDaemon.buffer = bridgeDaemon.buffer.slice(newline + 1);
+      if (line && handleBridgeDaemonLine(line)) {
+        answered = true;
+      }
+    }
+  });
+  
+  child.stderr.on('data', (chunk) => {
+    console.log('Python bridge (serve) stderr:', chunk.toString());
+  });
+  
+  child.on('error', (error) => {
+    console.error('Resident Python bridge failed to start:', error.message);
+    // Spawning itself failed, so fall back to one process per command for this session
+    bridgeDaemon.disabled = true;
+    if (bridgeDaemon.process === child) {
+      bridgeDaemon.process = null;
+    }
+    
+    // Nothing reached Python, so queued requests can safely be re-run on their own
+    for (const pending of bridgeDaemon.pending.values()) {
+      runBridgeProcess(pending.command, pending.data).then(pending.resolve);
+    }
+    bridgeDaemon.pending.clear();
+  });
+  
+  child.on('close', (code) => {
+    console.log('Resident Python bridge exited with code:', code);
+    if (bridgeDaemon.process === child) {
+      bridgeDaemon.process = null;
+    }
+    
+    if (!answered) {
+      // Exited without answering anything (e.g. a bridge without serve mode), so nothing
+      // was applied: re-run the requests on their own and stop using the resident bridge
+      console.warn('Resident Python bridge exited before answering - using one process per command');
+      bridgeDaemon.disabled = true;
+      for (const pending of bridgeDaemon.pending.values()) {
+        runBridgeProcess(pending.command, pending.data).then(pending.resolve);
+      }
+      bridgeDaemon.pending.clear();
+      return;
+    }
+    
+    // Requests already sent may or may not have been applied, so they must not be retried
+    for (const pending of bridgeDaemon.pending.values()) {
+      pending.resolve({ success: false, error: `Python bridge exited unexpectedly (code ${code})` });
+    }
+    bridgeDaemon.pending.clear();
+  });
+  
+  return child;
+}
+
+// Returns null when the resident bridge is unavailable and the caller should spawn instead
+function callBridgeDaemon(command, data) {
+  if (bridgeDaemon.disabled) {
+    return null;
+  }
+  
+  if (!bridgeDaemon.process) {
+    if (bridgeDaemon.restarts >= BRIDGE_DAEMON_MAX_RESTARTS) {
+      console.warn('Resident Python bridge keeps exiting - using one process per command');
+      bridgeDaemon.disabled = true;
+      return null;
+    }
+    if (bridgeDaemon.nextId > 1) {
+      bridgeDaemon.restarts++;
+    }
+    startBridgeDaemon();
+  }
+  
+  const id = bridgeDaemon.nextId++;
+  const request = { jsonrpc: '2.0', id, method: command };
+  if (data) {
+    request.params = data;
+  }
+  
+  return new Promise((resolve) => {
+    bridgeDaemon.pending.set(id, { command, data, resolve });
+    bridgeDaemon.process.stdin.write(JSON.stringify(request) + '\n', (error) => {
+      if (error && bridgeDaemon.pending.has(id)) {
+        bridgeDaemon.pending.delete(id);
+        resolve({ success: false, error: `Failed to send command to Python bridge: ${error.message}` });
+      }
+    });
+  });
+}
+
+function stopBridgeDaemon() {
+  const child = bridgeDaemon.process;
+  if (!child) {
+    return;
+  }
+  bridgeDaemon.process = null;
+  bridgeDaemon.disabled = true;
+  
+  try {
+    child.stdin.write(JSON.stringify({ jsonrpc: '2.0', id: 0, method: 'shutdown' }) + '\n');
+    child.stdin.end();
+  } catch (e) {
+    child.kill();
+  }
+}
+
 // IPC handler to execute Python bridge commands
 ipcMain.handle('python-bridge', async (event, command, data = null) => {
+  const daemonResult = callBridgeDaemon(command, data);
+  if (daemonResult) {
+    return daemonResult;
+  }
+  return runBridgeProcess(command, data);
+});
+
+// Run a single bridge command in its own Python process
+function runBridgeProcess(command, data = null) {
   return new Promise((resolve) => {
     // Get the Python executable path and derive script path from it
     const pythonExePath = getEmbeddedPythonPath();
-    
-    let pythonScriptPath;
-    if (pythonExePath !== 'python3') {
-      // Determine script path based on platform and python executable location
-      let runtimeDir;
-      
-      if (os.platform() === 'win32') {
-        // On Windows, python.exe is directly in the runtime directory
-        runtimeDir = path.dirname(pythonExePath);
-      } else {
-        // On macOS, python3 is in bin/ subdirectory
-        runtimeDir = path.dirname(path.dirname(pythonExePath)); // Remove /bin/python3 to get runtime dir
-      }
-      
-      pythonScriptPath = path.join(runtimeDir, 'electron_bridge.py');
-    } else {
-      // Development fallback
-      pythonScriptPath = path.join(__dirname, 'python', 'electron_bridge.py');
-    }
+    const pythonScriptPath = getBridgeScriptPath(pythonExePath);
     
     console.log('Python script path:', pythonScriptPath);
     console.log('Python executable path:', pythonExePath);
@@ -1049,14 +1249,7 @@ ipcMain.handle('python-bridge', async (event, command, data = null) => {
     console.log('App paths - process.execPath:', process.execPath);
     
     // Determine the best working directory
-    let workingDir = __dirname;
-    
-    // In packaged apps, __dirname is inside app.asar and not accessible
-    // Use the app's main directory instead
-    if (process.resourcesPath && __dirname.includes('app.asar')) {
-      // Use the app bundle's main directory (one level up from Resources)
-      workingDir = path.dirname(process.resourcesPath);
-    }
+    const workingDir = getBridgeWorkingDir();
 
     // Write debug info to file for troubleshooting
     try {
@@ -1123,7 +1316,9 @@ Arch: ${os.arch()}
       
       if (code === 0 && stdout.trim()) {
         try {
-          const result = JSON.parse(stdout.trim());
+          // The result is the last line; commands such as cohort print partial results ahead of it
+          const lines = stdout.trim().split('\n');
+          const result = JSON.parse(lines[lines.length - 1]);
           resolve({ success: true, data: result });
         } catch (e) {
           resolve({ 
@@ -1166,7 +1361,7 @@ Arch: ${os.arch()}
       });
     });
   });
-});
+}
 
 // IPC handler to save settings for Python bridge
 ipcMain.handle('save-python-settings', async (event, settings) => {
@@ -1176,20 +1371,10 @@ ipcMain.handle('save-python-settings', async (event, settings) => {
     const debugLog = [];
     
     if (process.resourcesPath && __dirname.includes('app.asar')) {
-      // Built app: first check if user has existing development settings
-      const devSettingsPath = '/Users/andrewjolley/lecture-logger/python/electron_settings.json';
-      debugLog.push(`Checking for dev settings at: ${devSettingsPath}`);
-      
-      if (fs.existsSync(devSettingsPath)) {
-        // Use existing development settings location
-        settingsPath = devSettingsPath;
-        debugLog.push(`Using existing dev settings`);
-      } else {
-        // Save to app bundle location
-        const appDir = path.dirname(process.resourcesPath);
-        settingsPath = path.join(appDir, 'python', 'electron_settings.json');
-        debugLog.push(`Using app bundle settings path`);
-      }
+      // Built app: save to app bundle location
+      const appDir = path.dirname(process.resourcesPath);
+      settingsPath = path.join(appDir, 'python', 'electron_settings.json');
+      debugLog.push(`Using app bundle settings path`);
     } else {
       // Development: save to the main python directory
       settingsPath = path.join(__dirname, 'python', 'electron_settings.json');
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Cross-process write lock for the OTJ workbook
+Finding the next blank row and saving the entry into it must not interleave
+between processes (a double-clicked submit, or the CLI and the app at once),
+or both pick the same row and one entry is lost. The lock is a file in the
+system temp folder, so every copy of the backend on the machine shares it,
+holding the PID of its owner; a lock left by a process that died, or held
+for longer than any write takes, is taken over.
+"""
+
+import json
+import os
+import socket
+import tempfile
+import time
+import uuid
+
+import otj_cache
+
+LOCK_TIMEOUT = 30.0  # Seconds to wait for another process before giving up
+STALE_AFTER = 120.0  # Seconds after which a held lock is assumed abandoned
+POLL_INTERVAL = 0.01  # First wait between attempts, doubled up to MAX_POLL_INTERVAL
+MAX_POLL_INTERVAL = 0.2
+
+
+class LockTimeout(Exception):
+    """Another process kept the workbook locked for longer than the timeout"""
+
+
+def lock_path(workbook_path):
+    """Lock file guarding writes to the given workbook"""
+    return os.path.join(tempfile.gettempdir(), f"otj-write-{otj_cache.workbook_key(workbook_path)}.lock")
+
+
+def _pid_alive(pid):
+    """Whether a process with this PID is still running"""
+    if os.name == 'nt':
+        # os.kill(pid, 0) would send CTRL_C_EVENT on Windows
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Running under another user
+    return True
+
+
+class WorkbookLock:
+    """Advisory lock around a workbook's find-row -> write -> save section.
+
+    Use as a context manager, or call acquire() and release(). stats() reports
+    how long acquiring it took and whether another process was holding it.
+    """
+
+    def __init__(self, workbook_path, timeout=LOCK_TIMEOUT, stale_after=STALE_AFTER):
+        self.path = lock_path(workbook_path)
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.held = False
+        self.waited = 0.0
+        self.attempts = 0
+        self.holder = None
+        self.stale_removed = 0
+        self.record = None  # Bytes written to the lock file while we hold it
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+        return False
+
+    def _read(self):
+        """Raw contents of the lock file, or None if there is none"""
+        try:
+            with open(self.path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    @staticmethod
+    def _parse(raw):
+        """Owner recorded in lock file contents, or None if they can't be read"""
+        try:
+            return json.loads(raw.decode('utf-8'))
+        except (AttributeError, ValueError):
+            return None
+
+    def _remove_if(self, expected):
+        """Delete the lock file only if it still holds the bytes expected; returns whether it did.
+
+        The file is first renamed to a name of our own, so no other process can
+        replace it between the check and the delete; a lock that turns out not
+        to be the one expected is put back unless a new one has appeared since.
+        """
+        claimed = f"{self.path}.{uuid.uuid4().hex}.old"
+        try:
+            os.rename(self.path, claimed)
+        except OSError:
+            return False  # Gone already, or just claimed by another process
+        try:
+            with open(claimed, 'rb') as f:
+                found = f.read()
+        except OSError:
+            found = None
+        if found == expected:
+            os.remove(claimed)
+            return True
+        try:
+            os.link(claimed, self.path)  # Fails rather than overwrite a newer lock
+        except OSError:
+            pass
+        try:
+            os.remove(claimed)
+        except OSError:
+            pass
+        return False
+
+    def _is_stale(self, holder):
+        if holder is None:
+            # Half written by its owner, or just removed - stale only once it has sat there a while
+            try:
+                return time.time() - os.path.getmtime(self.path) > self.stale_after
+            except OSError:
+                return False
+        if time.time() - holder.get("acquired", 0) > self.stale_after:
+            return True
+        return holder.get("host") == socket.gethostname() and not _pid_alive(holder.get("pid", 0))
+
+    def acquire(self):
+        """Take the lock, waiting for another process to release it; raises LockTimeout"""
+        if self.held:
+            return self
+        start = time.perf_counter()
+        interval = POLL_INTERVAL
+        while True:
+            self.attempts += 1
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                raw = self._read()
+                if raw is None:
+                    continue  # Released between the two calls
+                holder = self._parse(raw)
+                if holder is not None:
+                    self.holder = holder.get("pid")
+                if self._is_stale(holder):
+                    # Only the lock judged stale goes, never one taken since by another process
+                    if self._remove_if(raw):
+                        self.stale_removed += 1
+                    continue
+                if time.perf_counter() - start >= self.timeout:
+                    self.waited = time.perf_counter() - start
+                    raise LockTimeout(f"Workbook is being written by another process (PID {self.holder}) - try again shortly")
+                time.sleep(interval)
+                interval = min(interval * 2, MAX_POLL_INTERVAL)
+                continue
+
+            self.record = json.dumps({"pid": os.getpid(), "host": socket.gethostname(),
+                                      "acquired": time.time()}).encode('utf-8')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self.record)
+            self.held = True
+            self.waited = time.perf_counter() - start
+            return self
+
+    def release(self):
+        """Give the lock up; does nothing if it isn't held.
+
+        If another process took the lock over as stale, its lock is left alone.
+        """
+        if not self.held:
+            return
+        self.held = False
+        self._remove_if(self.record)
+
+    def stats(self):
+        """Contention figures for the last acquire()"""
+        return {
+            "waited": round(self.waited, 4),
+            "attempts": self.attempts,
+            "contended": self.attempts > 1,
+            "holder_pid": self.holder,
+            "stale_removed": self.stale_removed
+        }
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Settings loader for the Electron bridge
+Finds electron_settings.json once per process and keeps the parsed settings in
+memory, re-reading the file only when its size or modification time changes.
+"""
+
+import json
+import os
+
+SETTINGS_FILE = "electron_settings.json"
+CLEAN_SETTINGS_FILE = "electron_settings_clean.json"
+
+DEFAULT_SETTINGS = {
+    "excelPath": "",
+    "startingRow": 1,
+    "verboseLogging": False,
+    "timestamp": ""
+}
+
+_settings_path = None
+_clean_settings_path = None
+_cached = None  # (size, mtime_ns, settings) of the last successful read
+
+
+def candidate_dirs():
+    """Directories that may hold the settings file, most preferred first"""
+    script_dir = os.path.dirname(__file__)
+    cwd = os.getcwd()
+
+    possible_paths = [
+        # Set explicitly, e.g. by the benchmarks (highest priority)
+        os.environ.get("OTJ_SETTINGS_DIR"),
+        # Current development: main python directory
+        os.path.join(cwd, 'python'),
+        # Development: script directory if running from python/
+        script_dir,
+        # Built app: relative to working directory
+        cwd,
+        # Built app: relative to script directory
+        os.path.dirname(script_dir),
+        # Built app: app.asar structure
+        os.path.join(os.path.dirname(cwd), 'python'),
+        # Built app: alongside runtime directory
+        os.path.join(os.path.dirname(script_dir), '..', 'python'),
+        # Built app: in app bundle Contents directory
+        os.path.join(cwd, '..', 'python') if 'Contents' in cwd else None,
+    ]
+    return [p for p in possible_paths if p is not None]
+
+
+def resolve_settings_path():
+    """Return (settings path, clean template path), probing the candidates only once"""
+    global _settings_path, _clean_settings_path
+
+    if _settings_path is None:
+        dirs = candidate_dirs()
+        # If no existing settings are found, use the first path (main python directory)
+        python_dir = next((d for d in dirs if os.path.exists(os.path.join(d, SETTINGS_FILE))), dirs[0])
+        _settings_path = os.path.join(python_dir, SETTINGS_FILE)
+        _clean_settings_path = os.path.join(python_dir, CLEAN_SETTINGS_FILE)
+
+    return _settings_path, _clean_settings_path
+
+
+def forget():
+    """Drop the resolved location and cached settings so the next load starts afresh"""
+    global _settings_path, _clean_settings_path, _cached
+    _settings_path = None
+    _clean_settings_path = None
+    _cached = None
+
+
+def _create_settings(settings_path, clean_settings_path):
+    """Create the user settings file from the clean template, or from the defaults"""
+    try:
+        with open(clean_settings_path, 'r') as f:
+            settings = json.load(f)
+    except FileNotFoundError:
+        # Fallback if clean template doesn't exist
+        settings = dict(DEFAULT_SETTINGS)
+
+    with open(settings_path, 'w') as f:
+        json.dump(settings, f, indent=2)
+    return settings
+
+
+def load_settings():
+    """Return a copy of the current settings, re-reading the file only when it has changed"""
+    global _cached
+
+    settings_path, clean_settings_path = resolve_settings_path()
+    try:
+        stat = os.stat(settings_path)
+    except FileNotFoundError:
+        # Settings removed since they were found - look again before creating a new file
+        forget()
+        settings_path, clean_settings_path = resolve_settings_path()
+        if not os.path.exists(settings_path):
+            return dict(_create_settings(settings_path, clean_settings_path))
+        stat = os.stat(settings_path)
+
+    if _cached is not None and _cached[0] == stat.st_size and _cached[1] == stat.st_mtime_ns:
+        return dict(_cached[2])
+
+    try:
+        with open(settings_path, 'r') as f:
+            settings = json.load(f)
+    except json.JSONDecodeError:
+        return {}  # Return empty dict if JSON is invalid
+
+    _cached = (stat.st_size, stat.st_mtime_ns, settings)
+    return dict(settings)
@@ -17,12 +17,6 @@ def path():
     return path     #return path (will be blank due to path = "" if there is exception)
 
 
-def wrtTXT(file,line):  #function to write txt to a requested txt file.
-    filename = open(file, 'a') #open file in append mode
-    filename.write(line) # write the specified line to the end of the file
-    filename.close() # close file 
-    
-    
 def readTXT(name): #reads text files
     filename = open(name, 'r') #open file in read mode
     contents = filename.readlines() # read all content from the file and store in var
@@ -85,19 +79,18 @@ def readDate(row):      #specific function to read a date from a specified row
 
 
 def findInCol(term,col,style):      #function to find a term in a column and return as either the raw text, or total instances of the term
-    wb = load_workbook(path)    #open workbook and sheet
-    sheet = wb["OTJ log"]
-    
     output = []     #define output list
     total = 0       #define total variable
     
-    for iterateRows in range (18, sheet.max_row):       #iterate through all rows
-        contents = (sheet.cell(row=iterateRows, column=col).value)      #read the cell contents 
-        contents = str(contents)    #convert to str
+    with read_only_workbook(path) as wb:    #stream the sheet read-only instead of loading every cell
+        sheet = wb["OTJ log"]
         
-        if term in contents:        #if the term can be found in the cell's contents, then add the Cell's location to the output list
-            output.append(f"{iterateRows}/{col}")
-            total += 1      #used for style 2 (total instances). Increase total by 1
+        for iterateRows, contents in iter_column(sheet, col, 18, sheet.max_row - 1):       #iterate through all rows
+            contents = str(contents)    #convert to str
+            
+            if term in contents:        #if the term can be found in the cell's contents, then add the Cell's location to the output list
+                output.append(f"{iterateRows}/{col}")
+                total += 1      #used for style 2 (total instances). Increase total by 1
                 
     if output and style == 1:   #return output list for style 1
         return output
@@ -108,7 +101,7 @@ def findInCol(term,col,style):      #function to find a term in a column and ret
     
 
 def findFirstBlankRow():    #finds the first blank row in the .xlsx where the data should be written. Note, this is the first row with no data, not the first with no formatting (thats ~2000). 
-    return int((findInCol("None",3,1)[0][:-2]))    #uses find in col, passed 'None' and asks for column 3 style 1, which returns the coordinates. 
+    return next_blank_rows(path, 18)[0]     #checks the remembered next row is still free, only searching column C again if it isn't
 
 
 #
@@ -120,26 +113,75 @@ def findFirstBlankRow():    #finds the first blank row in the .xlsx where the da
 
 ## WRITING TO EXCEL ##
 
-def writeRow():     #function to write rowData list to excel file. This is run after all the required info from the below functions has been collated. 
+def writeRow(heldLock=None):     #function to write rowData list to excel file. This is run after all the required info from the below functions has been collated. 
     global rowData  #global to be used in the other functions below
     
     print("\nAdding this data to the log. Please wait...")    #status message to user
 
-    wb = load_workbook(path)    #open workbook
-    sheet = wb["OTJ log"]   #open sheet
-    
-    row = findFirstBlankRow()    #get the first blank row available
-    
-    for col, value in enumerate(rowData, start=3):  # start=1 means column A
-        sheet.cell(row=row, column=col, value=value)
-    
-    wb.save(path)   #save file
+    mark = time.perf_counter()
+    with nullcontext(heldLock) if heldLock else WorkbookLock(path) as writeLock:     #stops another copy of the app or CLI picking the same row before this one is saved (replayJournal() passes in the lock it already holds)
+        add_timing(timings, "lock", mark)     #seconds spent waiting for another process to finish writing
+        if writeLock.attempts > 1:
+            log(f"writeRow() - Waited {writeLock.waited:.3f}s for the workbook lock (PID {writeLock.holder})",1)
+        
+        mark = time.perf_counter()
+        row = findFirstBlankRow()    #get the first blank row available
+        add_timing(timings, "find_row", mark)
+        storeWasCurrent = otj_store.is_current(path)    #whether the SQLite copy of the log matched the workbook before this write
+        try:
+            entryId = otj_journal.begin(path, {row: rowData})   #journal the entry first, so if the program is killed mid-save it gets written on the next start
+        except OSError as e:      #not fatal - only the crash recovery is lost, so save the entry anyway
+            log(f"writeRow() - Unable to journal the entry - {e}",2)
+            entryId = None
+    
+        try:      #covers the openpyxl fallback as well as the row patch
+            try:
+                patch_rows(path, "OTJ log", {row: rowData}, timings=timings)     #write just this row into the sheet XML, leaving the rest of the file as it is (adds load/write/save timings)
+            except RowPatchError as e:      #unusual workbook layout, so load and save the whole thing with openpyxl instead
+                log(f"writeRow() - Row patch not possible ({e}) - saving with openpyxl",1)
+        
+                mark = time.perf_counter()
+                wb = load_workbook(path)    #open workbook
+                sheet = wb["OTJ log"]   #open sheet
+                mark = add_timing(timings, "load", mark)
+        
+                for col, value in enumerate(rowData, start=3):  # start=1 means column A
+                    sheet.cell(row=row, column=col, value=value)
+                mark = add_timing(timings, "write", mark)
+        
+                save_workbook(wb, path)   #save to a temp file and swap it in, so the log is never left half written
+                add_timing(timings, "save", mark)
+        except Exception:
+            otj_journal.finish(path, entryId)   #failed in the open rather than by a crash, so don't replay it
+            raise
+    
+        remember_next_row(path, 18, row + 1)    #the row after this one is where the next entry goes
+        try:
+            otj_store.record_rows(path, {row: rowData}, storeWasCurrent)     #mirror the entry into the SQLite copy of the log
+        except Exception as e:      #not fatal - the workbook is saved and the copy gets rebuilt by the next reconcile
+            log(f"writeRow() - Shadow store update failed - {e}",2)
+        otj_journal.finish(path, entryId)   #saved, so nothing to replay
     rowData = []    #reset row data list to avoid duplicate entries
     
     print("This data has now been added to the log.")   #print status message
     log(f"writeRow() - Wrote rowData to {path}",1)      #add to log
     
 
+def replayJournal():     #writes any entries journalled by an earlier run that was closed before it finished saving them
+    global rowData
+    try:
+        if not otj_journal.pending(path):     #nothing to replay, so don't wait for the lock
+            return
+        with WorkbookLock(path) as writeLock:     #held while reading the journal too, so an entry the app is still saving isn't written a second time
+            for entryId, rows in otj_journal.pending(path):
+                for values in otj_journal.unwritten(path, rows):    #skip anything that did make it into the workbook
+                    rowData = list(values)
+                    writeRow(writeLock)
+                otj_journal.finish(path, entryId)
+    except Exception as e:      #not fatal - the entries stay in the journal for next time
+        log(f"replayJournal() - Unable to replay journal - {e}",2)
+    
+
 def addDate():  #function to get the required date from the user
     global date     #global to be used in addAcadYear()
     
@@ -189,19 +231,7 @@ def addLocation():  #adding activity location to the rowData list
         selected = 0    #define var
         print("\nPlease choose a location: \n")     
         
-        options = [     #defining options list, each will have a selectable index number
-            "Home",
-            "Curzon Building, BCU City Centre",
-            "Millenium Point, BCU City Centre",
-            "SteamHouse, BCU City Centre",
-            "BBC London Broadcasting House",
-            "BBC Salford MediaCityUK",
-            "BBC Cymru Wales",
-            "BBC Scotland, Pacific Quay",
-            "BBC Belfast Broadcasting House",
-            "BBC Wood Norton",
-            "BBC Bristol"
-            ]
+        options = load_options(path).lists["locations"]     #the locations offered in the app
         
         
         for i in range (1,len(options)):    #define the indexes of the options
@@ -233,23 +263,7 @@ def addType():   #adding activity type to the rowData list
         
         selected = 0    #define var
 
-        options = [        #defining options list, each will have a selectable index number
-            "Annual Leave",
-            "Assignment Writing",
-            "Combination of activities",
-            "External Practice Exposure",
-            "Lecture",
-            "Other",
-            "Placement",
-            "Protected Learning",
-            "Reading",
-            "Research",
-            "Revision",
-            "Seminar",
-            "Tutorial",
-            "Work shadowing",
-            "Independent Study"
-        ]
+        options = load_options(path).lists["activityTypes"]     #activity types from the workbook's "Data tables" sheet, as offered in the app
 
         for i in range (1,len(options)):     #define the indexes of the options
             print(f"{i} - {options[i]}")    #and print
@@ -280,26 +294,7 @@ def addModule():      #see above
         
         selected = 0
 
-        options = [
-            "Not applicable",
-            "DIG4142",
-            "CMP4267",
-            "ENG4099",
-            "CMP4286",
-            "DIG4143",
-            "ENG4098",
-            "ENG5139",
-            "CMP5346",
-            "CMP5347",
-            "CMP5345",
-            "CMP5348",
-            "DIG5130",
-            "DIG6204",
-            "CMP6195",
-            "DIG6209",
-            "DIG6202",
-            "DIG6203"
-        ]
+        options = load_options(path).lists["moduleCodes"]     #module codes from the workbook's "Lookup Table" sheet, as offered in the app
 
         for i in range (len(options)):
             print(f"{i+1} - {options[i]}")
@@ -362,7 +357,9 @@ def addDetails():       #function to add details of activity to rowData
 def addKSB():       #add KSBs to rowData
     try: 
         if rowData[4] != "Not applicable":      #only if module code provided
+            mark = time.perf_counter()
             KSB = getKSB(rowData[4])    #use getKSB() to get the KSBs for the provided code
+            add_timing(timings, "ksb", mark)
             print("KSBs received")
             rowData.append(KSB)     #add to rowData
     except Exception as e:  #error handling
@@ -604,19 +601,19 @@ def log(line,style):    #function to log input with either info, error or fatal
     
     currentTime = (datetime.now()).strftime("%Y-%m-%d %H:%M:%S")    #get current time
     
-    if style == 1:      #depending on the style, use wrtTXT() to write the output defined to the log.txt file in Backend Files. 
+    if style == 1:      #depending on the style, queue the output defined for the log.txt file in Backend Files (written in batches by logFile, see otj_log.py)
         output = "INFO    - {} - {}\n".format(currentTime,line)
-        wrtTXT("Backend Files (Hidden)/log.txt",output)
+        logFile.write(output)
     elif style == 2:
         output = "#ERROR# - {} - {}\n".format(currentTime,line)
-        wrtTXT("Backend Files (Hidden)/log.txt",output)
+        logFile.write(output)
     elif style == 999:
         output = "#FATAL# - {} - {}\n".format(currentTime,line)
-        wrtTXT("Backend Files (Hidden)/log.txt",output)
+        logFile.write(output, urgent=True)      #written straight away as fatal() force quits without running exit handlers
     
     elif style == "Start":      #used to generate a program started message to clearly show a new instance. 
         output = "\n\n\nPROGRAM STARTED @ {}\n\n".format(currentTime)
-        wrtTXT("Backend Files (Hidden)/log.txt",output)
+        logFile.write(output)
     
     else:   #if the log style cannot be defined, recur back through and send error message.  
         log(f"In function 'log()' - UNKNOWN LOG STYLE '{style}'",2)
@@ -679,6 +676,8 @@ def moreEntries():  #ask the user if they want to add more data
         
 def runProgram():
     try:
+        timings.clear()     #phase timings for this entry, filled in by addKSB() and writeRow()
+        
         addDate()
         addAcadYear()
         addLocation()
@@ -692,6 +691,7 @@ def runProgram():
         addDeclaration()
         
         writeRow()
+        log("runProgram() - Timings: " + ", ".join(f"{phase}={round(seconds, 4)}s" for phase, seconds in timings.items()),1)     #where the time went for this entry, for spotting slow saves
     
         moreEntries()
         
@@ -713,7 +713,14 @@ import warnings    #import warnings to silence any data warnings from OpenPyXL i
 warnings.simplefilter("ignore", UserWarning)
 
 from openpyxl import load_workbook   #import openpyxl
+from otj_xlsx import read_only_workbook, iter_column, next_blank_rows, remember_next_row, patch_rows, RowPatchError, add_timing, save_workbook    #streaming scans and row writer shared with the Electron bridge
+import otj_store    #SQLite copy of the log, kept in step with every row written
+import otj_journal    #write-ahead journal of entries being saved
+from otj_options import load_options    #dropdown lists read from the workbook once per version and shared with the Electron bridge
+from otj_lock import WorkbookLock    #lock file shared with the Electron bridge so only one process writes the log at a time
+from otj_log import BufferedLog    #batches log lines instead of opening log.txt for every one
 from datetime import datetime    #these are pretty obvious
+from contextlib import nullcontext
 import time
 import os
 
@@ -722,7 +729,10 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 # Change working directory to that folder
 os.chdir(current_dir)
 
+logFile = BufferedLog("Backend Files (Hidden)/log.txt")    #buffered log file, flushed in the background and rotated once it gets large
+
 rowData = []    #define for adding entries to instances of writing rows
+timings = {}    #seconds spent in each phase of the current entry (ksb, lock, find_row, load, write, save)
 
 
 #
@@ -739,6 +749,7 @@ log("","Start")   #adds a starting line to the log for the current instance
 path()  #gets the file path for the Excel file
 
 if path != "":  #if path exists
+    replayJournal()     #finish off any entry a previous run didn't get to save
     print(getInitNotes())
     runProgram()
     
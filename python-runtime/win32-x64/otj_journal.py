@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Write-ahead journal for log entries
+Entries are appended to a small journal file in the per-user bridge_cache
+folder (see otj_cache.data_dir) before the workbook is written and marked done once it has been saved. If the bridge or
+the CLI is killed mid-save, the entries still pending are found on the next
+start and written again unless the workbook already holds them.
+"""
+
+import json
+import os
+import uuid
+from datetime import datetime
+
+import otj_cache
+import otj_store
+
+JOURNAL_NAME = "journal"
+
+
+def journal_path(workbook_path):
+    """Append-only journal file for the given workbook"""
+    return otj_cache.adopt_legacy(otj_cache.cache_path(JOURNAL_NAME, workbook_path, extension=".jsonl"))
+
+
+def _append(workbook_path, record):
+    os.makedirs(otj_cache.CACHE_DIR, exist_ok=True)
+    with open(journal_path(workbook_path), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, default=str) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _read(workbook_path):
+    """Return the journal records in order, skipping a torn last line"""
+    records = []
+    try:
+        with open(journal_path(workbook_path), 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return records
+
+
+def begin(workbook_path, rows):
+    """Journal {row number: [values of columns C-N]} about to be written; returns its id"""
+    entry_id = uuid.uuid4().hex
+    _append(workbook_path, {
+        "id": entry_id,
+        "time": datetime.now().isoformat(),
+        "rows": {str(row): values for row, values in rows.items()}
+    })
+    return entry_id
+
+
+def finish(workbook_path, entry_id):
+    """Mark a journalled write as settled, either saved or reported to the user as failed.
+
+    Does nothing for entry_id None (a write that couldn't be journalled).
+    """
+    if entry_id is None:
+        return
+    try:
+        _append(workbook_path, {"id": entry_id, "done": True})
+    except OSError:
+        # Left pending; a replay finds the rows already in the workbook and settles it then
+        return
+    if not pending(workbook_path):
+        # Nothing left to replay - start the next journal empty
+        try:
+            os.remove(journal_path(workbook_path))
+        except OSError:
+            pass
+
+
+def pending(workbook_path):
+    """Return [(id, {row number: values})] for journalled writes never marked done"""
+    if not os.path.exists(journal_path(workbook_path)):
+        return []
+
+    writes = {}
+    for record in _read(workbook_path):
+        if record.get("done"):
+            writes.pop(record.get("id"), None)
+        elif "rows" in record:
+            writes[record["id"]] = {int(row): values for row, values in record["rows"].items()}
+    return list(writes.items())
+
+
+def unwritten(workbook_path, rows):
+    """Values from a pending write that the workbook doesn't hold at their journalled rows"""
+    written = otj_store.rows_holding(workbook_path, rows)
+    return [values for row, values in sorted(rows.items()) if row not in written]
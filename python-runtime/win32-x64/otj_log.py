@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Buffered log file writer shared by electron_bridge.py and OTJ_Automation.py
+Lines are kept in memory and appended in one write, either by a background
+thread every FLUSH_INTERVAL seconds or at exit, instead of opening the log file
+for every line. The file is rotated once it grows past MAX_LOG_BYTES.
+"""
+
+import atexit
+import os
+import sys
+import threading
+import time
+
+FLUSH_INTERVAL = 1.0  # Seconds between background flushes
+MAX_LOG_BYTES = 1024 * 1024
+LOG_BACKUPS = 3  # Rotated files kept as log.txt.1 (newest) .. log.txt.3
+
+
+class BufferedLog:
+    """Append-only log file that batches writes and rotates by size"""
+
+    def __init__(self, path, max_bytes=MAX_LOG_BYTES, backups=LOG_BACKUPS, flush_interval=FLUSH_INTERVAL):
+        self.path = os.path.abspath(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._thread = None
+        atexit.register(self.flush)
+
+    def write(self, text, urgent=False):
+        """Queue text for the log; urgent text (errors before a forced exit) is written straight away"""
+        with self._lock:
+            self._buffer.append(text)
+        if urgent:
+            self.flush()
+        elif self._thread is None:
+            # Started on first use so commands that never log don't pay for a thread
+            self._thread = threading.Thread(target=self._flush_periodically, name="log-flush", daemon=True)
+            self._thread.start()
+
+    def flush(self):
+        """Write out everything queued so far"""
+        with self._lock:
+            if not self._buffer:
+                return
+            text = "".join(self._buffer)
+            self._buffer = []
+
+            try:
+                log_dir = os.path.dirname(self.path)
+                if log_dir and not os.path.exists(log_dir):
+                    os.makedirs(log_dir, exist_ok=True)
+                self._rotate_if_needed(len(text.encode('utf-8')))
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(text)
+            except Exception as e:
+                # If logging fails, print to stderr (which gets captured by Electron)
+                print(f"Log write failed: {e}", file=sys.stderr)
+
+    def _rotate_if_needed(self, incoming):
+        """Shift log -> log.1 -> log.2 ... when the next write would pass max_bytes"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size == 0 or size + incoming <= self.max_bytes:
+            return
+
+        for index in range(self.backups, 0, -1):
+            source = self.path if index == 1 else f"{self.path}.{index - 1}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index}")
+        if self.backups == 0:
+            os.remove(self.path)
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
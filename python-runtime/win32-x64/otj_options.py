@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Dropdown options for the form, read from the workbook
+Module codes come from the "Lookup Table" sheet (and the module columns of the
+KSB matrix, which can list more) and activity types from the "Data tables"
+sheet, once per workbook version; the lists are kept in the sidecar cache and
+in memory, so get_options doesn't open the workbook again until it changes.
+Lists the workbook doesn't hold (locations, declaration and confirmation) and
+any it can't be read for use the built-in defaults.
+"""
+
+import os
+
+import otj_cache
+
+OPTIONS_CACHE = "dropdown_options"
+LOOKUP_SHEET = "Lookup Table"  # Module | KSBs, one module per row below the header
+DATA_SHEET = "Data tables"  # Column B: activity types, then Yes/No/Not applicable, academic years, standards
+
+DEFAULT_OPTIONS = {
+    "locations": [
+        "Home",
+        "Curzon Building, BCU City Centre",
+        "Millenium Point, BCU City Centre",
+        "SteamHouse, BCU City Centre",
+        "BBC London Broadcasting House",
+        "BBC Salford MediaCityUK",
+        "BBC Cymru Wales",
+        "BBC Scotland, Pacific Quay",
+        "BBC Belfast Broadcasting House",
+        "BBC Wood Norton",
+        "BBC Bristol"
+    ],
+    "activityTypes": [
+        "Annual Leave",
+        "Assignment Writing",
+        "Combination of activities",
+        "External Practice Exposure",
+        "Lecture",
+        "Other",
+        "Placement",
+        "Protected Learning",
+        "Reading",
+        "Research",
+        "Revision",
+        "Seminar",
+        "Tutorial",
+        "Work shadowing",
+        "Independent Study"
+    ],
+    "moduleCodes": [
+        "Not applicable",
+        "DIG4142",
+        "CMP4267",
+        "ENG4099",
+        "CMP4286",
+        "DIG4143",
+        "ENG4098",
+        "ENG5139",
+        "CMP5346",
+        "CMP5347",
+        "CMP5345",
+        "CMP5348",
+        "DIG5130",
+        "DIG6204",
+        "CMP6195",
+        "DIG6209",
+        "DIG6202",
+        "DIG6203"
+    ],
+    "declarationOptions": [
+        "Yes",
+        "No"
+    ],
+    "confirmationOptions": [
+        "Yes",
+        "No",
+        "Not applicable"
+    ]
+}
+
+# Parsed options per workbook: absolute path -> ((size, mtime_ns), DropdownOptions)
+_loaded = {}
+
+
+class DropdownOptions:
+    """The dropdown lists, each also held as a frozenset and a value -> position map"""
+
+    def __init__(self, lists):
+        self.lists = {name: list(values) for name, values in lists.items()}
+        self.sets = {name: frozenset(values) for name, values in self.lists.items()}
+        self.index = {name: {value: position for position, value in enumerate(values)}
+                      for name, values in self.lists.items()}
+
+    def check(self, name, value, field_name):
+        """Raise if value isn't one of the options in list name"""
+        if value not in self.sets[name]:
+            raise Exception(f"Invalid value for {field_name}: '{value}'. Must be one of: {', '.join(self.lists[name])}")
+
+    def as_dict(self):
+        """The lists as returned to Electron"""
+        return {name: list(values) for name, values in self.lists.items()}
+
+
+def _text(value):
+    return " ".join(str(value).split()) if value is not None else ""
+
+
+def read_options(workbook_path):
+    """Read the module codes and activity types from the workbook's lookup sheets"""
+    from otj_xlsx import KSB_SHEET, read_only_workbook  # Only when the lists aren't cached - it brings in openpyxl
+
+    lists = {name: list(values) for name, values in DEFAULT_OPTIONS.items()}
+    with read_only_workbook(workbook_path) as wb:
+        modules = []
+        if KSB_SHEET in wb.sheetnames:
+            # Row 2 of the matrix holds "CODE Title" headers from column C
+            for header in next(wb[KSB_SHEET].iter_rows(min_row=2, max_row=2, min_col=3, values_only=True), ()):
+                if _text(header):
+                    modules.append(_text(header).split()[0].upper())
+        if LOOKUP_SHEET in wb.sheetnames:
+            modules += [_text(value) for (value,) in wb[LOOKUP_SHEET].iter_rows(min_row=2, max_col=1, values_only=True)]
+        modules = [module for module in dict.fromkeys(modules) if module and module != "Not applicable"]
+        if modules:
+            lists["moduleCodes"] = ["Not applicable"] + modules
+
+        if DATA_SHEET in wb.sheetnames:
+            activity_types = []
+            for (value,) in wb[DATA_SHEET].iter_rows(min_col=2, max_col=2, values_only=True):
+                text = _text(value)
+                if text in DEFAULT_OPTIONS["confirmationOptions"]:
+                    break  # End of the activity types - the Yes/No block follows
+                if text and text not in activity_types:
+                    activity_types.append(text)
+            if activity_types:
+                lists["activityTypes"] = activity_types
+    return lists
+
+
+def load_options(workbook_path):
+    """Return the DropdownOptions for a workbook, reading its sheets only when it has changed"""
+    try:
+        stat = os.stat(workbook_path)
+    except (OSError, TypeError, ValueError):
+        # Not set or can't be reached (e.g. offline) - the last lists read from it, else the defaults
+        lists, _ = otj_cache.load_cache_any_version(OPTIONS_CACHE, workbook_path) if workbook_path else (None, False)
+        return DropdownOptions(lists or DEFAULT_OPTIONS)
+
+    key = os.path.abspath(workbook_path)
+    version = (stat.st_size, stat.st_mtime_ns)
+    loaded = _loaded.get(key)
+    if loaded is not None and loaded[0] == version:
+        return loaded[1]
+
+    lists = otj_cache.load_cache(OPTIONS_CACHE, workbook_path)
+    if lists is None:
+        try:
+            lists = read_options(workbook_path)
+        except Exception:
+            # Unreadable right now - offer the defaults without remembering them
+            return DropdownOptions(DEFAULT_OPTIONS)
+        otj_cache.save_cache(OPTIONS_CACHE, workbook_path, lists)
+
+    options = DropdownOptions(lists)
+    _loaded[key] = (version, options)
+    return options
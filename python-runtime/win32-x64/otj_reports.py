@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Reports computed from the OTJ log for the Electron app
+Totals are worked out from the column snapshot of the log (see otj_columns.py),
+so the workbook is parsed once per version however many reports are asked
+for, and each report is kept in the sidecar cache until the workbook changes,
+so the app can show totals without Excel refreshing the workbook's pivot table.
+"""
+
+import re
+from array import array
+from datetime import date
+
+import otj_cache
+import otj_columns
+from otj_xlsx import LOG_SHEET, read_only_workbook, iter_log_entries, log_date, log_number
+
+SUMMARY_CACHE = "summary"
+PROBLEMS_CACHE = "log_problems"
+KSB_COVERAGE_CACHE = "ksb_coverage"
+
+# Logged for the record but not counted as OTJ hours, as in the log's running total formula
+NON_OTJ_ACTIVITIES = ("Protected Learning", "Annual Leave")
+
+SUMMARY_GROUPS = ["academic_year", "month", "module", "activity_type"]
+
+# Problem rows listed in full; the rest are only counted
+PROBLEM_LIMIT = 50
+
+# KSB headings in column B of the KSB sheet, e.g. "K2 Audio and Video Systems"
+KSB_HEADING = re.compile(r"^\s*([KSB]\d+)\b\s*(.*)$")
+# One code or range in a log row's KSB column: "K2", "8" (same letter as before), "S1-3", "K4-K7"
+KSB_TOKEN = re.compile(r"([KSB])?\s*(\d+)(?:\s*-\s*[KSB]?\s*(\d+))?")
+MAX_KSB_RANGE = 50
+
+
+def _group_totals(codes, labels, hours, otj_hours):
+    """Total the hour columns per dictionary code, merging codes with the same label, sorted by label"""
+    counts, (totals, otj_totals) = otj_columns.group_totals(codes, len(labels), hours, otj_hours)
+    groups = {}
+    for label, entries, total, otj_total in zip(labels, counts, totals, otj_totals):
+        if entries:
+            group = groups.setdefault(label, [0, 0.0, 0.0])
+            group[0] += entries
+            group[1] += total
+            group[2] += otj_total
+
+    return [
+        {"key": key, "entries": entries, "hours": round(total, 2), "otj_hours": round(otj_total, 2)}
+        for key, (entries, total, otj_total) in sorted(groups.items())
+    ]
+
+
+def _month_codes(days):
+    """Dictionary-encode the "YYYY-MM" of each day ordinal; returns (codes, labels)"""
+    day_codes = {}
+    label_codes = {}
+    codes = array('I')
+    for day in days:
+        code = day_codes.get(day)
+        if code is None:
+            label = date.fromordinal(day).strftime("%Y-%m") if day else "Unknown"
+            code = day_codes[day] = label_codes.setdefault(label, len(label_codes))
+        codes.append(code)
+    return codes, list(label_codes)
+
+
+def build_summary(workbook_path):
+    """Total duration by academic year, month, module and activity type from the log's columns"""
+    with otj_columns.open_snapshot(workbook_path) as snapshot:
+        names = snapshot.dictionaries
+        # Missing durations (NaN) count as nothing
+        hours = array('d', (duration if duration == duration else 0.0 for duration in snapshot.column("duration")))
+        activity_codes = snapshot.column("activity_type")
+        excluded = [any(name in activity for name in NON_OTJ_ACTIVITIES) for activity in names["activity_type"]]
+        otj_hours = array('d', (0.0 if excluded[code] else duration for code, duration in zip(activity_codes, hours)))
+
+        groups = {
+            "academic_year": (snapshot.column("academic_year"), [label or "Unknown" for label in names["academic_year"]]),
+            "month": _month_codes(snapshot.column("day")),
+            "module": (snapshot.column("module"), [label or "Not applicable" for label in names["module"]]),
+            "activity_type": (activity_codes, [label or "Unknown" for label in names["activity_type"]])
+        }
+
+        summary = {
+            "total": {"entries": len(hours), "hours": round(sum(hours), 2), "otj_hours": round(sum(otj_hours), 2)}
+        }
+        for group in SUMMARY_GROUPS:
+            codes, labels = groups[group]
+            summary[f"by_{group}"] = _group_totals(codes, labels, hours, otj_hours)
+    return summary
+
+
+def summary(workbook_path):
+    """Return the hours summary, rebuilding it only when the workbook has changed"""
+    cached = otj_cache.load_cache(SUMMARY_CACHE, workbook_path)
+    if cached is not None:
+        return cached, True
+
+    result = build_summary(workbook_path)
+    otj_cache.save_cache(SUMMARY_CACHE, workbook_path, result)
+    return result, False
+
+
+def academic_year(when):
+    """Academic year of a date as logged, e.g. "24/25" for anything from Sep 2024 to Aug 2025"""
+    start = when.year if when.month >= 9 else when.year - 1
+    return f"{start % 100:02d}/{(start + 1) % 100:02d}"
+
+
+def row_problems(values):
+    """Reasons one log row wouldn't pass the app's validation, as a list of strings"""
+    problems = []
+    when = log_date(values[0])
+    if when is None:
+        problems.append(f"date '{values[0]}' is not DD/MM/YYYY")
+    elif str(values[1] or "").strip() != academic_year(when):
+        problems.append(f"academic year '{values[1]}' doesn't match the date ({academic_year(when)})")
+
+    for col, name in ((3, "activity type"), (4, "module"), (5, "description")):
+        if not str(values[col] or "").strip():
+            problems.append(f"no {name}")
+
+    duration = log_number(values[9])
+    if duration is None or duration <= 0 or duration >= 50:
+        problems.append(f"duration '{values[9]}' is not between 0 and 50 hours")
+    return problems
+
+
+def build_problems(workbook_path):
+    """Check every logged entry in one pass; lists the first PROBLEM_LIMIT rows with problems"""
+    rows = []
+    count = 0
+    checked = 0
+    with read_only_workbook(workbook_path) as wb:
+        for row, values in iter_log_entries(wb[LOG_SHEET]):
+            checked += 1
+            found = row_problems(values)
+            if found:
+                count += 1
+                if len(rows) < PROBLEM_LIMIT:
+                    rows.append({"row": row, "problems": found})
+    return {"entries_checked": checked, "problem_rows": count, "rows": rows}
+
+
+def problems(workbook_path):
+    """Return the log problems report, rebuilding it only when the workbook has changed"""
+    cached = otj_cache.load_cache(PROBLEMS_CACHE, workbook_path)
+    if cached is not None:
+        return cached, True
+
+    result = build_problems(workbook_path)
+    otj_cache.save_cache(PROBLEMS_CACHE, workbook_path, result)
+    return result, False
+
+
+def parse_ksbs(text):
+    """KSB codes named in a log row's KSB column, in order and without repeats.
+
+    Understands the shorthand used when logging by hand as well as the app's
+    own "K2,S2": "K1,2,8, S2" is K1, K2, K8 and S2; "K4-7" is K4 to K7.
+    """
+    codes = []
+    letter = None
+    for prefix, first, last in KSB_TOKEN.findall(str(text or "").upper()):
+        letter = prefix or letter
+        if letter is None:
+            continue
+        first = int(first)
+        last = int(last) if last else first
+        if last < first or last - first > MAX_KSB_RANGE:
+            last = first
+        for number in range(first, last + 1):
+            code = f"{letter}{number}"
+            if code not in codes:
+                codes.append(code)
+    return codes
+
+
+def ksb_list(headings):
+    """[(code, title)] of every KSB among the headings in column B of the KSB sheet, in sheet order"""
+    listed = []
+    for value in headings:
+        match = KSB_HEADING.match(str(value or ""))
+        if match and match.group(1) not in dict(listed):
+            listed.append((match.group(1), " ".join(match.group(2).split()).rstrip(":")))
+    return listed
+
+
+def build_ksb_coverage(workbook_path):
+    """Evidence count and hours per KSB against the full list, from the log's columns.
+
+    Each distinct KSB text is parsed once and its totals shared out to the
+    codes it names, rather than parsing every row.
+    """
+    with otj_columns.open_snapshot(workbook_path) as snapshot:
+        listed = ksb_list(snapshot.header["ksb_sheet"])
+        texts = snapshot.dictionaries["ksbs"]
+        ksb_codes = snapshot.column("ksbs")
+        hours = array('d', (duration if duration == duration else 0.0 for duration in snapshot.column("duration")))
+        counts, (totals,) = otj_columns.group_totals(ksb_codes, len(texts), hours)
+        last_days = otj_columns.group_max(ksb_codes, len(texts), snapshot.column("day"))
+
+    coverage = {code: [0, 0.0, 0] for code, title in listed}
+    unlisted = {}
+    without_ksbs = 0
+    for text, entries, total, last_day in zip(texts, counts, totals, last_days):
+        codes = parse_ksbs(text)
+        if not codes:
+            without_ksbs += entries
+            continue
+        for code in codes:
+            if code not in coverage:
+                unlisted[code] = unlisted.get(code, 0) + entries
+                continue
+            evidence = coverage[code]
+            evidence[0] += entries
+            evidence[1] += total
+            evidence[2] = max(evidence[2], last_day)
+
+    ksbs = [
+        {
+            "code": code,
+            "title": title,
+            "entries": coverage[code][0],
+            "hours": round(coverage[code][1], 2),
+            "last_evidence": date.fromordinal(coverage[code][2]).strftime("%d/%m/%Y") if coverage[code][2] else None
+        }
+        for code, title in listed
+    ]
+    return {
+        "ksbs": ksbs,
+        "covered": sum(1 for ksb in ksbs if ksb["entries"]),
+        "total": len(ksbs),
+        "missing": [ksb["code"] for ksb in ksbs if not ksb["entries"]],
+        "unlisted": dict(sorted(unlisted.items())),
+        "entries_without_ksbs": without_ksbs
+    }
+
+
+def ksb_coverage(workbook_path):
+    """Return the KSB coverage report, rebuilding it only when the workbook has changed"""
+    cached = otj_cache.load_cache(KSB_COVERAGE_CACHE, workbook_path)
+    if cached is not None:
+        return cached, True
+
+    result = build_ksb_coverage(workbook_path)
+    otj_cache.save_cache(KSB_COVERAGE_CACHE, workbook_path, result)
+    return result, False
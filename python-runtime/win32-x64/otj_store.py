@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+SQLite shadow store of the OTJ log
+Every entry written by the bridge or the CLI is mirrored into a SQLite database
+in bridge_cache/, so questions about existing entries can be answered without
+parsing the workbook. The store remembers the workbook fingerprint it mirrors;
+when the workbook has been changed elsewhere (e.g. edited in Excel) the store
+is brought back into line with reconcile(). Each entry keeps hashes of its
+row's contents, so that pass only decodes and re-indexes the rows whose hash
+changed: a resync after an edit costs one read of the sheet XML plus the rows
+edited, not a rebuild of the whole log.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+from contextlib import closing
+
+import otj_cache
+from otj_xlsx import LOG_SHEET, LogScan, RowPatchError, read_only_workbook, iter_log_entries, log_date, log_number
+
+STORE_NAME = "otj_log"
+SCHEMA_VERSION = "4"
+
+ENTRY_FIELDS = [
+    "date", "academic_year", "location", "activity_type", "module", "description",
+    "details", "ksbs", "next_steps", "duration", "declaration", "confirmation"
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    row INTEGER PRIMARY KEY,
+    entry_key TEXT,
+    date TEXT,
+    day TEXT,
+    academic_year TEXT,
+    location TEXT,
+    activity_type TEXT,
+    module TEXT,
+    description TEXT,
+    details TEXT,
+    ksbs TEXT,
+    next_steps TEXT,
+    duration REAL,
+    declaration TEXT,
+    confirmation TEXT,
+    length INTEGER,
+    raw_hash TEXT,
+    row_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_day ON entries (day);
+CREATE INDEX IF NOT EXISTS entries_key ON entries (entry_key);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT,
+    row INTEGER,
+    count INTEGER,
+    PRIMARY KEY (term, row)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_row ON postings (row);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+INSERT_ENTRY = "INSERT OR REPLACE INTO entries (row, entry_key, day, {}, length, raw_hash, row_hash) VALUES ({})".format(
+    ", ".join(ENTRY_FIELDS), ", ".join("?" * (len(ENTRY_FIELDS) + 6)))
+
+# Free-text columns indexed for search: description, details and next steps
+SEARCH_COLUMNS = [5, 6, 8]
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# BM25 ranking parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+PREFIX_WEIGHT = 0.5
+
+
+def store_path(workbook_path):
+    """SQLite file mirroring the given workbook"""
+    return otj_cache.cache_path(STORE_NAME, workbook_path, extension=".sqlite")
+
+
+def connect(workbook_path):
+    """Open the store for workbook_path, creating or resetting its schema as needed"""
+    os.makedirs(otj_cache.CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(store_path(workbook_path))
+    conn.row_factory = sqlite3.Row
+
+    version = None
+    try:
+        found = conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        version = found[0] if found else None
+    except sqlite3.OperationalError:
+        pass
+    if version != SCHEMA_VERSION:
+        # Older layout - start again; the next reconcile() fills it back in
+        conn.executescript("DROP TABLE IF EXISTS entries; DROP TABLE IF EXISTS postings; DROP TABLE IF EXISTS meta;")
+        conn.executescript(SCHEMA)
+        with conn:
+            conn.execute("INSERT INTO meta (key, value) VALUES ('schema', ?)", (SCHEMA_VERSION,))
+    return conn
+
+
+def entry_key(values):
+    """Hash identifying an entry by its date, activity type, module and description.
+
+    Case and spacing are ignored, so re-typing the same lecture still matches.
+    """
+    when = log_date(values[0])
+    parts = [when.strftime("%d/%m/%Y") if when else str(values[0]).strip()]
+    for value in (values[3], values[4], values[5]):
+        parts.append(" ".join(str(value or "").split()).casefold())
+    return hashlib.sha1("\x1f".join(parts).encode('utf-8')).hexdigest()
+
+
+def entry_values(row, values):
+    """Parameters for INSERT_ENTRY from one row's values for columns C-N"""
+    values = list(values) + [None] * (len(ENTRY_FIELDS) - len(values))
+    when = log_date(values[0])
+    fields = [when.strftime("%d/%m/%Y") if when else str(values[0]).strip()]
+    for value in values[1:len(ENTRY_FIELDS)]:
+        fields.append(None if value is None else str(value))
+    fields[9] = log_number(values[9])
+    return [row, entry_key(values), when.strftime("%Y-%m-%d") if when else None] + fields
+
+
+def tokenize(text):
+    """Lower-case words of text, as indexed and searched"""
+    return TOKEN_PATTERN.findall(str(text or "").casefold())
+
+
+def _store_entry(conn, row, values, raw_hash=None, row_hash=None):
+    """Insert or replace one entry along with its search postings.
+
+    raw_hash and row_hash are the row's LogScan digests; rows stored without
+    them (just written by the bridge) are decoded again by the next reconcile.
+    """
+    counts = {}
+    for col in SEARCH_COLUMNS:
+        if col < len(values):
+            for term in tokenize(values[col]):
+                counts[term] = counts.get(term, 0) + 1
+
+    conn.execute(INSERT_ENTRY, entry_values(row, values) + [sum(counts.values()), raw_hash, row_hash])
+    conn.execute("DELETE FROM postings WHERE row = ?", (row,))
+    conn.executemany("INSERT INTO postings (term, row, count) VALUES (?, ?, ?)",
+                     [(term, row, count) for term, count in counts.items()])
+
+
+def _read_fingerprint(conn):
+    found = conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+    return json.loads(found[0]) if found else None
+
+
+def _write_fingerprint(conn, fingerprint):
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)", (json.dumps(fingerprint),))
+
+
+def is_current(workbook_path):
+    """Check the store mirrors the workbook as it is on disk now"""
+    try:
+        with closing(connect(workbook_path)) as conn:
+            stored = _read_fingerprint(conn)
+            if stored is None:
+                return False
+            matches, restamp = otj_cache.fingerprint_matches(stored, workbook_path)
+            if restamp:
+                with conn:
+                    _write_fingerprint(conn, otj_cache.workbook_fingerprint(workbook_path))
+            return matches
+    except (sqlite3.Error, OSError):
+        return False
+
+
+def record_rows(workbook_path, rows, was_current):
+    """Mirror {row number: [values of columns C-N]} just written to the workbook.
+
+    was_current is whether the store matched the workbook before the write;
+    only then does it match afterwards, otherwise it stays marked as stale.
+    """
+    with closing(connect(workbook_path)) as conn:
+        with conn:
+            for row, values in sorted(rows.items()):
+                _store_entry(conn, row, values)
+            if was_current:
+                _write_fingerprint(conn, otj_cache.workbook_fingerprint(workbook_path))
+
+
+def _remove_entries(conn, rows):
+    conn.executemany("DELETE FROM entries WHERE row = ?", [(row,) for row in rows])
+    conn.executemany("DELETE FROM postings WHERE row = ?", [(row,) for row in rows])
+
+
+def _rebuild(conn, workbook_path):
+    """Refill the store from the workbook through openpyxl; returns the number of entries"""
+    with read_only_workbook(workbook_path) as wb:
+        conn.execute("DELETE FROM entries")
+        conn.execute("DELETE FROM postings")
+        count = 0
+        for row, values in iter_log_entries(wb[LOG_SHEET]):
+            _store_entry(conn, row, values)
+            count += 1
+    return count
+
+
+def reconcile(workbook_path):
+    """Bring the store into line with the workbook, re-deriving only the rows that changed.
+
+    Rows whose raw XML hashes the same as when they were stored are left
+    alone. The rest have their contents hashed; a row that still holds the
+    same values (Excel re-saved it differently) only has its raw hash updated,
+    otherwise it is decoded and stored again. Rows no longer in the log are
+    removed. Returns {"entries", "changed", "removed"}.
+    """
+    fingerprint = otj_cache.workbook_fingerprint(workbook_path)
+    with closing(connect(workbook_path)) as conn, conn:
+        try:
+            scan = LogScan(workbook_path)
+        except RowPatchError:
+            # Unusual layout - fall back to re-reading every row
+            entries = _rebuild(conn, workbook_path)
+            _write_fingerprint(conn, fingerprint)
+            return {"entries": entries, "changed": entries, "removed": 0}
+
+        stored = {row: (raw_hash, row_hash) for row, raw_hash, row_hash
+                  in conn.execute("SELECT row, raw_hash, row_hash FROM entries")}
+        removed = [row for row in stored if row not in scan.raw_digests]
+        _remove_entries(conn, removed)
+
+        changed = 0
+        for row, raw_hash in scan.raw_digests.items():
+            stored_raw, stored_content = stored.get(row, (None, None))
+            if raw_hash == stored_raw:
+                continue
+            row_hash = scan.content_digest(row)
+            if row_hash == stored_content:
+                conn.execute("UPDATE entries SET raw_hash = ? WHERE row = ?", (raw_hash, row))
+                continue
+            _store_entry(conn, row, scan.values(row), raw_hash, row_hash)
+            changed += 1
+        _write_fingerprint(conn, fingerprint)
+    return {"entries": len(scan.raw_digests), "changed": changed, "removed": len(removed)}
+
+
+def open_current(workbook_path):
+    """Return a connection to the store, reconciling it first if the workbook has changed"""
+    if not is_current(workbook_path):
+        reconcile(workbook_path)
+    return connect(workbook_path)
+
+
+def find_duplicate(workbook_path, values):
+    """Return the row already holding an entry with the same key as values, or None"""
+    with closing(open_current(workbook_path)) as conn:
+        found = conn.execute("SELECT row FROM entries WHERE entry_key = ? ORDER BY row LIMIT 1",
+                             (entry_key(values),)).fetchone()
+    return found[0] if found else None
+
+
+def rows_holding(workbook_path, rows):
+    """Return the rows of {row number: values} whose logged entry matches those values"""
+    with closing(open_current(workbook_path)) as conn:
+        return {
+            row for row, values in rows.items()
+            if conn.execute("SELECT 1 FROM entries WHERE row = ? AND entry_key = ?",
+                            (row, entry_key(values))).fetchone()
+        }
+
+
+def search(workbook_path, query, limit=20):
+    """Return entries matching query, best first, ranked by BM25 over the indexed text.
+
+    Every word of the query is matched as a whole word except the last, which
+    also matches as a prefix so partly typed searches still find results.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return []
+
+    with closing(open_current(workbook_path)) as conn:
+        total, average_length = conn.execute("SELECT COUNT(*), AVG(length) FROM entries").fetchone()
+        if not total:
+            return []
+        average_length = average_length or 1.0
+
+        scores = {}
+        for term in dict.fromkeys(terms):
+            if term == terms[-1]:
+                # Words that merely start with the term count for half as much as the word itself
+                matches = conn.execute(
+                    "SELECT p.row, SUM(CASE WHEN p.term = ? THEN p.count ELSE p.count * ? END), e.length "
+                    "FROM postings p JOIN entries e ON e.row = p.row "
+                    "WHERE p.term >= ? AND p.term < ? GROUP BY p.row",
+                    (term, PREFIX_WEIGHT, term, term + "\uffff")).fetchall()
+            else:
+                matches = conn.execute(
+                    "SELECT p.row, p.count, e.length FROM postings p JOIN entries e ON e.row = p.row "
+                    "WHERE p.term = ?", (term,)).fetchall()
+
+            idf = math.log(1 + (total - len(matches) + 0.5) / (len(matches) + 0.5))
+            for row, count, length in matches:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * (length or 0) / average_length)
+                scores[row] = scores.get(row, 0.0) + idf * count * (BM25_K1 + 1) / (count + norm)
+
+        # Best score first; newer entries win ties
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:limit]
+        results = []
+        for row, score in ranked:
+            entry = conn.execute("SELECT * FROM entries WHERE row = ?", (row,)).fetchone()
+            results.append({
+                "row": row,
+                "score": round(score, 3),
+                "date": entry["date"],
+                "module": entry["module"],
+                "activity_type": entry["activity_type"],
+                "description": entry["description"],
+                "details": entry["details"],
+                "next_steps": entry["next_steps"],
+                "duration": entry["duration"]
+            })
+    return results
@@ -4,15 +4,28 @@ Electron Bridge for OTJ Automation
 Accepts JSON input from Electron app and processes it through the OTJ system - Credits Liam Shadwell
 """
 
+import time
+BRIDGE_START = time.perf_counter()
+
 import json
 import sys
 import os
-import subprocess
+import threading
 from datetime import datetime
 
+import otj_cache
+import otj_log
+import otj_options
+import otj_settings
+
+# Seconds spent in each start-up phase, reported by --timings
+startup_timings = {}
+
 # Function to install missing packages
 def install_package(package_name):
     """Install a package using pip"""
+    import subprocess
+
     try:
         # Try to import first
         __import__(package_name)
@@ -38,162 +51,423 @@ def install_package(package_name):
             print(f"Failed to install {package_name}: {e}")
             return False
 
-# Ensure required packages are installed
 required_packages = ["openpyxl"]
-for package in required_packages:
-    if not install_package(package):
-        print(f"Error: Could not install required package: {package}")
+
+# Written once the packages above are known to import under this interpreter
+ENVIRONMENT_MARKER = os.path.join(otj_cache.CACHE_DIR, "environment.json")
+
+def environment_verified():
+    """Check the marker left by provision_environment() matches this interpreter"""
+    try:
+        with open(ENVIRONMENT_MARKER, 'r', encoding='utf-8') as f:
+            marker = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return marker.get("python") == sys.executable and marker.get("python_version") == sys.version
+
+def provision_environment():
+    """Install any missing packages and record a verified-environment marker"""
+    for package in required_packages:
+        if not install_package(package):
+            raise Exception(f"Could not install required package: {package}")
+
+    import openpyxl
+    marker = {
+        "python": sys.executable,
+        "python_version": sys.version,
+        "openpyxl": openpyxl.__version__,
+        "verified": datetime.now().isoformat()
+    }
+    try:
+        os.makedirs(os.path.dirname(ENVIRONMENT_MARKER), exist_ok=True)
+        with open(ENVIRONMENT_MARKER, 'w', encoding='utf-8') as f:
+            json.dump(marker, f, indent=2)
+    except OSError as e:
+        # Without a marker the probe simply runs again next launch
+        print(f"Could not write environment marker: {e}", file=sys.stderr)
+    return marker
+
+# Ensure required packages are installed - only probed until the environment is verified
+if not environment_verified():
+    try:
+        provision_environment()
+    except Exception as e:
+        print(f"Error: {e}")
         sys.exit(1)
+startup_timings["environment_check"] = time.perf_counter() - BRIDGE_START
 
-# Import required libraries after ensuring they're installed
-import warnings
-warnings.simplefilter("ignore", UserWarning)
+class LazyImport:
+    """Stand-in for a module that is only imported the first time it is used.
 
-from openpyxl import load_workbook
-import time
+    Commands such as get_options never touch the workbook, so openpyxl and the
+    workbook helpers are kept out of their start-up entirely.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        """Import the module now if it hasn't been already and return it"""
+        if self._module is None:
+            self._module = import_workbook_support(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+def import_workbook_support(name="openpyxl"):
+    """Import openpyxl (re-provisioning it if it has gone missing) and then module name"""
+    import importlib
+    import warnings
+    warnings.simplefilter("ignore", UserWarning)
+
+    import_start = time.perf_counter()
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        # Package removed since the marker was written - provision again
+        provision_environment()
+    module = importlib.import_module(name)
+    startup_timings["imports"] = startup_timings.get("imports", 0) + time.perf_counter() - import_start
+    return module
+
+# Workbook helpers and the shadow store (and openpyxl with them) load on first use
+otj_xlsx = LazyImport("otj_xlsx")
+otj_store = LazyImport("otj_store")
+otj_reports = LazyImport("otj_reports")
+otj_journal = LazyImport("otj_journal")
+otj_lock = LazyImport("otj_lock")
+otj_queue = LazyImport("otj_queue")
 
 # Global variables
 rowData = []
 path = ""
+workbook_loads = 0  # Number of times the workbook has been parsed by this process
+phase_timings = {}  # Seconds spent in each phase of the current submit, returned as "timings"
 
-# Required functions copied from OTJ_Automation.py
-def wrtTXT(file, line):
-    """Write text to a file"""
+# Seconds between attempts by the resident bridge to write queued entries (see otj_queue.py)
+QUEUE_FLUSH_INTERVAL = 15.0
+
+# Sidecar caches (see otj_cache.py)
+KSB_INDEX_CACHE = "ksb_index"
+# Caches that appending a log row cannot invalidate
+LOG_WRITE_SAFE_CACHES = [KSB_INDEX_CACHE, otj_options.OPTIONS_CACHE]
+
+class WorkbookSession:
+    """Open the OTJ workbook once and share it between the helpers of a request.
+
+    Use as a context manager; pass session.wb to the helpers and call save()
+    once at the end instead of letting every helper parse the file itself.
+    """
+
+    def __init__(self, workbook_path):
+        self.path = workbook_path
+        self.wb = None
+
+    def __enter__(self):
+        self.wb = open_workbook()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wb = None
+        return False
+
+    def save(self):
+        """Write the shared workbook back to disk via a temp file and atomic rename"""
+        otj_xlsx.save_workbook(self.wb, self.path)
+
+def open_workbook(wb=None):
+    """Return the shared workbook if one is open, otherwise parse the file at path"""
+    global workbook_loads
+    if wb is not None:
+        return wb
+    workbook_loads += 1
+    return otj_xlsx.load_workbook(path)
+
+def write_log_rows(rows):
+    """Write {row number: rowData} to the OTJ log, saving the workbook once.
+
+    Patches the rows straight into the sheet XML; only when the workbook
+    layout isn't one the patcher understands is it loaded and re-saved
+    through openpyxl.
+    """
     try:
-        # Ensure directory exists
-        log_dir = os.path.dirname(file)
-        if log_dir and not os.path.exists(log_dir):
-            os.makedirs(log_dir, exist_ok=True)
-        
-        with open(file, 'a', encoding='utf-8') as filename:
-            filename.write(line)
+        otj_xlsx.patch_rows(path, otj_xlsx.LOG_SHEET, rows, timings=phase_timings)
+        return
+    except otj_xlsx.RowPatchError as e:
+        log(f"Row patch not possible ({str(e)}) - saving with openpyxl", 1)
+
+    mark = time.perf_counter()
+    with WorkbookSession(path) as session:
+        mark = otj_xlsx.add_timing(phase_timings, "load", mark)
+        sheet = session.wb[otj_xlsx.LOG_SHEET]
+        for row, values in rows.items():
+            for col, value in enumerate(values, start=otj_xlsx.DATE_COLUMN):
+                sheet.cell(row=row, column=col, value=value)
+        mark = otj_xlsx.add_timing(phase_timings, "write", mark)
+        session.save()
+        otj_xlsx.add_timing(phase_timings, "save", mark)
+
+def find_duplicate_row(values):
+    """Row already holding an entry with the same date, type, module and description, or None"""
+    try:
+        return otj_store.find_duplicate(path, values)
     except Exception as e:
-        # If logging fails, print to stderr (which gets captured by Electron)
-        print(f"Log write failed: {e}", file=sys.stderr)
+        # A broken index shouldn't stop the user logging
+        log(f"Duplicate check failed: {str(e)}", 2)
+        return None
+
+def save_log_rows(rows):
+    """Write {row number: rowData} to the workbook and bring the sidecar data up to date"""
+    store_was_current = otj_store.is_current(path)
+
+    # Journalled first so a write cut short by a crash is finished on the next start
+    try:
+        entry_id = otj_journal.begin(path, rows)
+    except OSError as e:
+        # Only crash recovery is lost - the entry itself is still saved
+        log(f"Journal write failed: {str(e)}", 2)
+        entry_id = None
+    try:
+        write_log_rows(rows)
+    except Exception:
+        # Reported to the user as failed, so it mustn't be replayed later
+        otj_journal.finish(path, entry_id)
+        raise
+    remember_next_row(max(rows) + 1)
+
+    # Our own row append leaves these caches valid; re-key them to the saved file
+    mark = time.perf_counter()
+    for cache_name in LOG_WRITE_SAFE_CACHES:
+        otj_cache.refresh_cache(cache_name, path)
+
+    try:
+        otj_store.record_rows(path, rows, store_was_current)
+    except Exception as e:
+        # The workbook is already saved; a stale store is rebuilt by the next reconcile
+        log(f"Shadow store update failed: {str(e)}", 2)
+    otj_xlsx.add_timing(phase_timings, "mirror", mark)
+
+    otj_journal.finish(path, entry_id)
+
+def workbook_writable(workbook_path):
+    """Whether the workbook can be written now - it exists and isn't locked (e.g. open in Excel on Windows)"""
+    try:
+        with open(workbook_path, 'r+b'):
+            return True
+    except OSError:
+        return False
+
+def workbook_in_use(error):
+    """Whether a failed save means another program holds the workbook, so the entry is worth queueing"""
+    # Windows reports a file open in Excel as a sharing (32) or lock (33) violation
+    return isinstance(error, PermissionError) or getattr(error, "winerror", None) in (32, 33)
+
+def check_workbook_missing(workbook_path):
+    """Raise if the workbook is missing from a folder that can be reached - a wrong path, not a locked or offline file"""
+    if not os.path.exists(workbook_path) and os.path.isdir(os.path.dirname(os.path.abspath(workbook_path))):
+        raise Exception(f"Excel file not found at path: {workbook_path}. Please check the file path in settings.")
+
+def lock_workbook():
+    """Take the cross-process write lock on the workbook at path (see otj_lock.py)"""
+    write_lock = otj_lock.WorkbookLock(path)
+    write_lock.acquire()
+    if write_lock.attempts > 1:
+        log(f"Bridge - Waited {write_lock.waited:.3f}s for the workbook lock (PID {write_lock.holder})", 1)
+    return write_lock
+
+def queue_entries(entries, started):
+    """Accept [(form entry, rowData)] into the offline queue while the workbook can't be written"""
+    # Dates are pinned so an entry for 'today' keeps its day however late it is written
+    otj_queue.enqueue(path, [dict(entry, date=values[0]) for entry, values in entries])
+    waiting = len(otj_queue.pending(path))
+    log(f"Bridge - Workbook unavailable, {len(entries)} entries queued ({waiting} waiting)", 1)
+    return {
+        "success": True,
+        "queued": True,
+        "message": f"Workbook unavailable - saved {len(entries)} entries to be added once it can be written "
+                   f"({waiting} waiting). Close it in Excel or check it is synced.",
+        "queue_length": waiting,
+        "timings": report_phase_timings(started)
+    }
+
+def flush_queue():
+    """Write entries queued while the workbook was unavailable, oldest first, in one save.
+
+    Returns the number written. Entries that no longer pass validation or are
+    already logged are dropped with an error in the log. Call with the workbook
+    lock held (see lock_workbook).
+    """
+    queued = otj_queue.pending(path)
+    if not queued or not workbook_writable(path):
+        return 0
+
+    keys = set()
+    written = []
+    dropped = []
+    for entry_id, entry in queued:
+        try:
+            values = build_row_data(entry)
+            key = otj_store.entry_key(values)
+            duplicate_row = find_duplicate_row(values)
+            if not entry.get('allowDuplicate') and (duplicate_row is not None or key in keys):
+                raise Exception(f"already logged in row {duplicate_row}" if duplicate_row else "queued twice")
+            keys.add(key)
+            written.append((entry_id, values))
+        except Exception as e:
+            log(f"Queued entry from {entry.get('date')} dropped: {str(e)}", 2)
+            dropped.append(entry_id)
+
+    if written:
+        try:
+            rows = findBlankRows(len(written))
+            save_log_rows(dict(zip(rows, [values for entry_id, values in written])))
+        except OSError as e:
+            # Locked again - they stay queued for the next attempt
+            log(f"Queued entries not written yet: {str(e)}", 1)
+            otj_queue.mark_done(path, dropped)
+            return 0
+        log(f"Bridge - Wrote {len(written)} queued entries to rows {rows[0]}-{rows[-1]}", 1)
+    otj_queue.mark_done(path, [entry_id for entry_id, values in written] + dropped)
+    return len(written)
+
+def flush_queue_periodically(lock):
+    """Background loop of the resident bridge: write queued entries once the workbook is free"""
+    while True:
+        time.sleep(QUEUE_FLUSH_INTERVAL)
+        with lock:
+            try:
+                if load_settings_from_electron().get('excelPath') and otj_queue.pending(configured_excel_path()):
+                    otj_xlsx.load()
+                    with lock_workbook():
+                        flush_queue()
+            except Exception as e:
+                log(f"Queue flush failed: {str(e)}", 2)
+
+def replay_journal():
+    """Write any entries journalled by an earlier run that was killed before saving them.
+
+    Call with the workbook lock held (see lock_workbook).
+    """
+    try:
+        for entry_id, rows in otj_journal.pending(path):
+            missing = otj_journal.unwritten(path, rows)
+            if missing:
+                save_log_rows(dict(zip(findBlankRows(len(missing)), missing)))
+                log(f"Bridge - Recovered {len(missing)} journalled entries", 1)
+            otj_journal.finish(path, entry_id)
+    except Exception as e:
+        log(f"Journal replay failed: {str(e)}", 2)
+
+# Required functions copied from OTJ_Automation.py
+# Log lines are buffered and the file rotated by size (see otj_log.py)
+bridge_log = otj_log.BufferedLog(os.path.join(os.path.dirname(os.path.abspath(__file__)), "bridge_log.txt"))
+
+def verbose_logging():
+    """Whether INFO lines are wanted, from the verboseLogging setting"""
+    try:
+        return bool(load_settings_from_electron().get('verboseLogging'))
+    except Exception:
+        return True
 
 def log(line, style):
-    """Log function with different styles"""
+    """Log function with different styles - INFO lines only when verboseLogging is on"""
+    if style == 1 and not verbose_logging():
+        return
+
     currentTime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
-    # Use a more reliable log path in the same directory as the script
-    log_path = os.path.join(os.path.dirname(__file__), "bridge_log.txt")
-    
     if style == 1:
         output = "INFO    - {} - {}\n".format(currentTime, line)
-        wrtTXT(log_path, output)
+        bridge_log.write(output)
     elif style == 2:
         output = "#ERROR# - {} - {}\n".format(currentTime, line)
-        wrtTXT(log_path, output)
+        bridge_log.write(output)
     elif style == 999:
         output = "#FATAL# - {} - {}\n".format(currentTime, line)
-        wrtTXT(log_path, output)
+        bridge_log.write(output, urgent=True)
 
-def findFirstBlankRow():
+def findFirstBlankRow(wb=None):
     """Find the first blank row in the Excel sheet"""
+    return findBlankRows(1, wb)[0]
+
+def findBlankRows(count, wb=None):
+    """Find the first count blank rows in the Excel sheet"""
     # Get starting row from settings
     settings = load_settings_from_electron()
     starting_row = settings.get('startingRow', 125)  # Default to 125 if not set
     
-    wb = load_workbook(path)
-    sheet = wb["OTJ log"]
-    
-    for row in range(starting_row, sheet.max_row + 1):
-        cell_value = sheet.cell(row=row, column=3).value
-        if cell_value is None:
-            return row
-    
-    # If no blank row found, return next row
-    return sheet.max_row + 1
+    if wb is not None:
+        return otj_xlsx.find_blank_rows(wb[otj_xlsx.LOG_SHEET], otj_xlsx.DATE_COLUMN, starting_row, count)
 
-def readCellKSB(row, col):
-    """Read cell from KSB sheet"""
-    wb = load_workbook(path)
-    sheet = wb["Broadcast & Media KSBs"]
-    
-    contents = sheet.cell(row=row, column=col).value
-    contents = str(contents) if contents is not None else "None"
-    
-    if contents == "None":
-        return f"NO DATA IN CELL {col}/{row}"
-    else:
-        return contents
+    # Cached pointer verified against the sheet XML, searching again only if it is wrong
+    return otj_xlsx.next_blank_rows(path, starting_row, count)
 
-def findInRowKSB(term, style):
-    """Find term in KSB sheet row"""
-    wb = load_workbook(path)
-    sheet = wb["Broadcast & Media KSBs"]
-    
-    output = []
-    total = 0
-    
-    for iterateCols in range(3, sheet.max_column + 1):
-        contents = sheet.cell(row=2, column=iterateCols).value
-        contents = str(contents) if contents is not None else ""
-        
-        if term in contents:
-            output.append(f"2/{iterateCols}")
-            total += 1
-    
-    if output and style == 1:
-        return output
-    elif output and style == 2:
-        return total
-    else:
-        return "Not found"
+def remember_next_row(row):
+    """Record row as the next free row of the workbook just saved"""
+    settings = load_settings_from_electron()
+    otj_xlsx.remember_next_row(path, settings.get('startingRow', 125), row)
 
-def findInColKSB(term, col, style):
-    """Find term in KSB sheet column"""
-    wb = load_workbook(path)
-    sheet = wb["Broadcast & Media KSBs"]
-    
-    output = []
-    total = 0
-    
-    for iterateRows in range(1, sheet.max_row + 1):
-        contents = sheet.cell(row=iterateRows, column=col).value
+def build_ksb_index(wb):
+    """Map every module code to its ordered KSB codes in one pass over the KSB sheet"""
+    sheet = wb[otj_xlsx.KSB_SHEET]
+    rows = list(sheet.iter_rows(min_row=1, values_only=True))
+
+    # Module columns start at C; row 2 holds "CODE Title" headers
+    headers = []
+    header_row = rows[1] if len(rows) > 1 else ()
+    for col in range(3, len(header_row) + 1):
+        contents = header_row[col - 1]
         contents = str(contents) if contents is not None else ""
-        
-        if term in contents:
-            output.append(f"{iterateRows}/{col}")
-            total += 1
-    
-    if output and style == 1:
-        return output
-    elif output and style == 2:
-        return total
-    else:
-        return "Not found"
+        if contents.strip():
+            headers.append((col, contents, contents.split()[0].upper()))
 
-def getKSB(module):
+    modules = {code: [] for _, _, code in headers}
+    for row in rows:
+        ksb_value = row[1] if len(row) > 1 else None
+        if ksb_value is None:
+            continue
+        for col, _, code in headers:
+            contents = row[col - 1] if len(row) >= col else None
+            if contents is not None and "x" in str(contents):
+                modules[code].append(str(ksb_value)[:2])
+
+    return {
+        "modules": modules,
+        "headers": [[header, code] for _, header, code in headers]
+    }
+
+def get_ksb_index(wb=None):
+    """Return the module -> KSB index, rebuilding it only when the workbook changed"""
+    index = otj_cache.load_cache(KSB_INDEX_CACHE, path)
+    if index is None:
+        if wb is not None:
+            index = build_ksb_index(wb)
+        else:
+            with otj_xlsx.read_only_workbook(path) as read_only_wb:
+                index = build_ksb_index(read_only_wb)
+        otj_cache.save_cache(KSB_INDEX_CACHE, path, index)
+        log("KSB index rebuilt", 1)
+    return index
+
+def getKSB(module, wb=None):
     """Get KSB codes for a module"""
     try:
         module = module.upper()
-        
-        rowsWithX = []
-        fullKSB = []
-        
-        received = findInRowKSB(module, 1)
-        if received == "Not found":
-            return ""
-        
-        column = str(received[0])
-        column = column.split("/")
-        column = int(column[1])
-        
-        rowsWithXOutput = findInColKSB("x", column, 1)
-        if rowsWithXOutput == "Not found":
+        index = get_ksb_index(wb)
+
+        fullKSB = index["modules"].get(module)
+        if fullKSB is None:
+            # Not a bare module code - fall back to matching the full header text
+            for header, code in index["headers"]:
+                if module in header:
+                    fullKSB = index["modules"][code]
+                    break
+
+        if not fullKSB:
             return ""
-        
-        for item in rowsWithXOutput:
-            parts = item.split("/")
-            number_after_slash = parts[0]
-            rowsWithX.append(number_after_slash)
-        
-        for item in rowsWithX:
-            ksb_value = readCellKSB(int(item), 2)
-            if ksb_value and not ksb_value.startswith("NO DATA"):
-                fullKSB.append(ksb_value[:2])
-        
+
         return str(",".join(fullKSB))
     except Exception as e:
         log(f"getKSB error: {str(e)}", 2)
@@ -221,89 +495,21 @@ def addConfirmation(confirmation_value):
 
 def load_settings_from_electron():
     """Load settings from electron_settings.json file"""
-    # Try multiple paths to find the settings file
-    script_dir = os.path.dirname(__file__)
-    cwd = os.getcwd()
-    
-    # Possible paths where settings might be located
-    # Try user's development location first to preserve existing settings
-    dev_project_path = "/Users/andrewjolley/lecture-logger/python"
-    
-    possible_paths = [
-        # User's existing development settings (highest priority)
-        dev_project_path,
-        # Current development: main python directory
-        os.path.join(cwd, 'python'),
-        # Development: script directory if running from python/
-        script_dir,
-        # Built app: relative to working directory
-        cwd,
-        # Built app: relative to script directory
-        os.path.dirname(script_dir),
-        # Built app: app.asar structure
-        os.path.join(os.path.dirname(cwd), 'python'),
-        # Built app: alongside runtime directory
-        os.path.join(os.path.dirname(script_dir), '..', 'python'),
-        # Built app: in app bundle Contents directory
-        os.path.join(cwd, '..', 'python') if 'Contents' in cwd else None,
-    ]
-    
-    # Remove None entries
-    possible_paths = [p for p in possible_paths if p is not None]
-    
-    settings_path = None
-    clean_settings_path = None
-    
-    # Try each possible path until we find the settings file
-    for python_dir in possible_paths:
-        test_settings_path = os.path.join(python_dir, "electron_settings.json")
-        if os.path.exists(test_settings_path):
-            settings_path = test_settings_path
-            clean_settings_path = os.path.join(python_dir, "electron_settings_clean.json")
-            break
-    
-    # If no existing settings found, use the first path (main python directory)
-    if not settings_path:
-        python_dir = possible_paths[0]
-        settings_path = os.path.join(python_dir, "electron_settings.json")
-        clean_settings_path = os.path.join(python_dir, "electron_settings_clean.json")
-    
-    try:
-        with open(settings_path, 'r') as f:
-            settings = json.load(f)
-        return settings
-    except FileNotFoundError:
-        # Create settings file from clean template
-        try:
-            with open(clean_settings_path, 'r') as f:
-                clean_settings = json.load(f)
-            
-            # Create user settings file from clean template
-            with open(settings_path, 'w') as f:
-                json.dump(clean_settings, f, indent=2)
-            
-            return clean_settings
-        except FileNotFoundError:
-            # Fallback if clean template doesn't exist
-            default_settings = {
-                "excelPath": "",
-                "startingRow": 1,
-                "verboseLogging": False,
-                "timestamp": ""
-            }
-            with open(settings_path, 'w') as f:
-                json.dump(default_settings, f, indent=2)
-            return default_settings
-    except json.JSONDecodeError:
-        return {}  # Return empty dict if JSON is invalid
+    # Located once per process and re-read only when the file changes (see otj_settings.py)
+    return otj_settings.load_settings()
 
-def get_excel_path():
-    """Get Excel file path from Electron settings"""
+def configured_excel_path():
+    """Get Excel file path from Electron settings, whether or not the file can be reached"""
     global path
     settings = load_settings_from_electron()
     path = settings.get('excelPath', '')
     if not path:
         raise Exception("Excel file path not set in settings. Please configure the Excel file path in the app settings.")
+    return path
+
+def get_excel_path():
+    """Get Excel file path from Electron settings"""
+    configured_excel_path()
     if not os.path.exists(path):
         raise Exception(f"Excel file not found at path: {path}. Please check the file path in settings.")
     return path
@@ -325,139 +531,206 @@ def calculate_academic_year(date_str):
     except Exception as e:
         raise Exception(f"Failed to calculate academic year: {str(e)}")
 
-def process_form_data(data):
-    """Process form data from Electron and write to Excel"""
-    global rowData, path
-    
+def is_valid_date(date_str):
+    """Check a date is DD/MM/YYYY or 'today'"""
     import re
-    try:
-        # Get Excel path
-        path = get_excel_path()
 
-        # Helper: Validate date format
-        def is_valid_date(date_str):
-            if date_str.lower() == 'today':
-                return True
-            return bool(re.match(r"^\d{2}/\d{2}/\d{4}$", date_str))
-
-        # Helper: Validate dropdown
-        def validate_dropdown(value, options, field_name):
-            if value not in options:
-                raise Exception(f"Invalid value for {field_name}: '{value}'. Must be one of: {', '.join(options)}")
-
-        # Validate required fields
-        required_fields = ['date', 'location', 'activityType', 'moduleCode', 'description', 'details', 'duration']
-        for field in required_fields:
-            if field not in data or not data[field]:
-                raise Exception(f"Missing required field: {field}")
-
-        # Validate date
-        date_value = data['date']
-        if not is_valid_date(date_value):
-            raise Exception("Date must be in format DD/MM/YYYY or 'today'")
-        if date_value.lower() == 'today':
-            date_value = datetime.now().strftime("%d/%m/%Y")
-
-        # Validate dropdowns
-        dropdowns = get_dropdown_options()
-        validate_dropdown(data['location'], dropdowns['locations'], 'location')
-        validate_dropdown(data['activityType'], dropdowns['activityTypes'], 'activityType')
-        validate_dropdown(data['moduleCode'], dropdowns['moduleCodes'], 'moduleCode')
-
-        # Validate conditional fields for declaration/confirmation logic
-        declaration_value = data.get('declaration', 'Yes')
-        validate_dropdown(declaration_value, dropdowns['declarationOptions'], 'declaration')
-        confirmation_value = data.get('confirmation', 'Not applicable')
-        validate_dropdown(confirmation_value, dropdowns['confirmationOptions'], 'confirmation')
-        if declaration_value == 'No' and (not confirmation_value or confirmation_value == 'Not applicable'):
-            raise Exception("Confirmation field is required and must not be 'Not applicable' when declaration is 'No'")
-
-        # Build rowData array in the same order as original script
-        global rowData
-        rowData = []
+    if date_str.lower() == 'today':
+        return True
+    return bool(re.match(r"^\d{2}/\d{2}/\d{4}$", date_str))
 
-        # Add date
-        rowData.append(date_value)
+def build_row_data(data):
+    """Validate one form entry and return its values for columns C-N"""
+    # Validate required fields
+    required_fields = ['date', 'location', 'activityType', 'moduleCode', 'description', 'details', 'duration']
+    for field in required_fields:
+        if field not in data or not data[field]:
+            raise Exception(f"Missing required field: {field}")
 
-        # Add academic year (calculated from date)
-        academic_year = calculate_academic_year(date_value)
-        rowData.append(academic_year)
+    # Validate date
+    date_value = data['date']
+    if not is_valid_date(date_value):
+        raise Exception("Date must be in format DD/MM/YYYY or 'today'")
+    if date_value.lower() == 'today':
+        date_value = datetime.now().strftime("%d/%m/%Y")
 
-        # Add location
-        rowData.append(data['location'])
+    # Validate dropdowns
+    dropdowns = load_dropdown_options()
+    dropdowns.check('locations', data['location'], 'location')
+    dropdowns.check('activityTypes', data['activityType'], 'activityType')
+    dropdowns.check('moduleCodes', data['moduleCode'], 'moduleCode')
 
-        # Add activity type
-        rowData.append(data['activityType'])
+    # Validate conditional fields for declaration/confirmation logic
+    declaration_value = data.get('declaration', 'Yes')
+    dropdowns.check('declarationOptions', declaration_value, 'declaration')
+    confirmation_value = data.get('confirmation', 'Not applicable')
+    dropdowns.check('confirmationOptions', confirmation_value, 'confirmation')
+    if declaration_value == 'No' and (not confirmation_value or confirmation_value == 'Not applicable'):
+        raise Exception("Confirmation field is required and must not be 'Not applicable' when declaration is 'No'")
 
-        # Add module code
-        rowData.append(data['moduleCode'])
+    # Build rowData array in the same order as original script
+    rowData = []
 
-        # Add description
-        rowData.append(data['description'])
+    # Add date
+    rowData.append(date_value)
 
-        # Add details
-        rowData.append(data['details'])
+    # Add academic year (calculated from date)
+    academic_year = calculate_academic_year(date_value)
+    rowData.append(academic_year)
 
-        # Add KSB (if module is not "Not applicable")
-        if data['moduleCode'] != "Not applicable":
-            try:
-                ksb = getKSB(data['moduleCode'])
-                rowData.append(ksb)
-            except Exception as e:
-                rowData.append("")  # Empty KSB if error
-                log(f"KSB Error: {str(e)}", 2)
-        else:
-            rowData.append("")  # Empty KSB for "Not applicable"
+    # Add location
+    rowData.append(data['location'])
+
+    # Add activity type
+    rowData.append(data['activityType'])
+
+    # Add module code
+    rowData.append(data['moduleCode'])
+
+    # Add description
+    rowData.append(data['description'])
 
-        # Add next steps
-        rowData.append(data.get('nextSteps', ''))
+    # Add details
+    rowData.append(data['details'])
 
-        # Add duration
+    # Add KSB (if module is not "Not applicable")
+    if data['moduleCode'] != "Not applicable":
         try:
-            duration = float(data['duration'])
-        except Exception:
-            raise Exception("Duration must be a number")
-        if duration <= 0 or duration >= 50:
-            raise Exception("Duration must be between 0 and 50 hours")
-        rowData.append(duration)
-
-        # Add declaration and confirmation (new columns M and N)
-        log(f"Adding declaration/confirmation - rowData length before: {len(rowData)}", 1)
-        declaration, confirmation = addDeclaration(declaration_value)
-        log(f"addDeclaration returned: {declaration}, {confirmation}", 1)
-        rowData.append(declaration)
-
-        # Add confirmation value
-        if confirmation is None:
-            # Declaration was 'No', so get confirmation from data
-            confirmation = addConfirmation(confirmation_value)
-            log(f"addConfirmation returned: {confirmation}", 1)
-        rowData.append(confirmation)
-        log(f"Final rowData length: {len(rowData)}", 1)
+            ksb_start = time.perf_counter()
+            ksb = getKSB(data['moduleCode'])
+            otj_xlsx.add_timing(phase_timings, "ksb", ksb_start)
+            rowData.append(ksb)
+        except Exception as e:
+            rowData.append("")  # Empty KSB if error
+            log(f"KSB Error: {str(e)}", 2)
+    else:
+        rowData.append("")  # Empty KSB for "Not applicable"
 
-        # Write to Excel
-        wb = load_workbook(path)
-        sheet = wb["OTJ log"]
+    # Add next steps
+    rowData.append(data.get('nextSteps', ''))
 
-        row = findFirstBlankRow()
+    # Add duration
+    try:
+        duration = float(data['duration'])
+    except Exception:
+        raise Exception("Duration must be a number")
+    if duration <= 0 or duration >= 50:
+        raise Exception("Duration must be between 0 and 50 hours")
+    rowData.append(duration)
+
+    # Add declaration and confirmation (new columns M and N)
+    log(f"Adding declaration/confirmation - rowData length before: {len(rowData)}", 1)
+    declaration, confirmation = addDeclaration(declaration_value)
+    log(f"addDeclaration returned: {declaration}, {confirmation}", 1)
+    rowData.append(declaration)
 
-        for col, value in enumerate(rowData, start=3):
-            sheet.cell(row=row, column=col, value=value)
+    # Add confirmation value
+    if confirmation is None:
+        # Declaration was 'No', so get confirmation from data
+        confirmation = addConfirmation(confirmation_value)
+        log(f"addConfirmation returned: {confirmation}", 1)
+    rowData.append(confirmation)
+    log(f"Final rowData length: {len(rowData)}", 1)
 
-        wb.save(path)
+    return rowData
+
+def record_validate_timing(start):
+    """Record validation time since start, excluding the KSB lookup it contains"""
+    mark = otj_xlsx.add_timing(phase_timings, "validate", start)
+    phase_timings["validate"] -= phase_timings.get("ksb", 0.0)
+    return mark
+
+def report_phase_timings(started):
+    """Round the phase timings for the JSON result and log them (shown with verboseLogging on)"""
+    timings = {phase: round(seconds, 4) for phase, seconds in phase_timings.items()}
+    timings["total"] = round(time.perf_counter() - started, 4)
+    log("Bridge - Timings: " + ", ".join(f"{phase}={seconds}s" for phase, seconds in timings.items()), 1)
+    return timings
+
+def process_form_data(data):
+    """Process form data from Electron and write to Excel"""
+    global rowData, path
+    
+    phase_timings.clear()
+    started = time.perf_counter()
+    write_lock = None
+    try:
+        # Workbook helpers load on first use - time that apart from the phases below
+        otj_xlsx.load()
+        mark = otj_xlsx.add_timing(phase_timings, "imports", started)
+
+        # Get Excel path
+        path = configured_excel_path()
+        writable = workbook_writable(path)
+        if not writable:
+            # Only a locked or offline workbook is worth queueing for
+            check_workbook_missing(path)
+        mark = otj_xlsx.add_timing(phase_timings, "settings", mark)
+        if writable:
+            try:
+                # Held until saved so another process can't take the same row
+                write_lock = lock_workbook()
+            except otj_lock.LockTimeout:
+                # Another process is still saving - queue rather than keep the user waiting
+                writable = False
+            mark = otj_xlsx.add_timing(phase_timings, "lock", mark)
+        if writable:
+            # Entries left by an interrupted write or queued while the workbook was unavailable
+            replay_journal()
+            flush_queue()
+            mark = otj_xlsx.add_timing(phase_timings, "recovery", mark)
+
+        rowData = build_row_data(data)
+        mark = record_validate_timing(mark)
+
+        if not writable:
+            entries = [(data, rowData)]
+            rowData = []
+            return queue_entries(entries, started)
+
+        # Refuse an entry that's already logged unless the user has confirmed it
+        duplicate_row = find_duplicate_row(rowData)
+        mark = otj_xlsx.add_timing(phase_timings, "duplicates", mark)
+        if duplicate_row is not None and not data.get('allowDuplicate'):
+            log(f"Bridge - Duplicate of row {duplicate_row} rejected", 1)
+            rowData = []
+            return {
+                "success": False,
+                "error": f"This entry is already logged in row {duplicate_row}",
+                "duplicate_row": duplicate_row
+            }
+
+        # Write to Excel
+        row = findFirstBlankRow()
+        otj_xlsx.add_timing(phase_timings, "find_row", mark)
+        try:
+            save_log_rows({row: rowData})
+        except OSError as e:
+            if not workbook_in_use(e):
+                raise
+            # Locked since it was checked - queue it rather than lose it
+            entries = [(data, rowData)]
+            rowData = []
+            return queue_entries(entries, started)
 
         # Log success
         log(f"Bridge - Successfully wrote data to row {row}", 1)
+        timings = report_phase_timings(started)
 
         # Reset rowData after writing (prevents duplicate entries)
         rowData = []
 
-        return {
+        result = {
             "success": True,
             "message": f"Successfully added entry to row {row}",
             "row": row,
-            "data": rowData
+            "data": rowData,
+            "timings": timings,
+            "lock": write_lock.stats()
         }
+        if duplicate_row is not None:
+            result["duplicate_row"] = duplicate_row
+        return result
 
     except Exception as e:
         error_msg = str(e)
@@ -466,142 +739,494 @@ def process_form_data(data):
             "success": False,
             "error": error_msg
         }
+    finally:
+        if write_lock is not None:
+            write_lock.release()
 
-def get_dropdown_options():
-    """Return dropdown options for Electron UI"""
+def process_batch(entries):
+    """Validate and write several form entries with a single save.
+
+    Every entry is validated before anything is written; if any fails, nothing
+    is written and each entry's result says why. Valid batches go into
+    consecutive blank rows in the order given.
+    """
+    global path
+
+    phase_timings.clear()
+    started = time.perf_counter()
+    write_lock = None
+    try:
+        if not isinstance(entries, list) or not entries:
+            raise Exception("Batch must be a non-empty list of entries")
+
+        # Workbook helpers load on first use - time that apart from the phases below
+        otj_xlsx.load()
+        mark = otj_xlsx.add_timing(phase_timings, "imports", started)
+
+        path = configured_excel_path()
+        writable = workbook_writable(path)
+        if not writable:
+            # Only a locked or offline workbook is worth queueing for
+            check_workbook_missing(path)
+        mark = otj_xlsx.add_timing(phase_timings, "settings", mark)
+        if writable:
+            try:
+                # Held until saved so another process can't take the same rows
+                write_lock = lock_workbook()
+            except otj_lock.LockTimeout:
+                # Another process is still saving - queue rather than keep the user waiting
+                writable = False
+            mark = otj_xlsx.add_timing(phase_timings, "lock", mark)
+        if writable:
+            # Entries left by an interrupted write or queued while the workbook was unavailable
+            replay_journal()
+            flush_queue()
+            mark = otj_xlsx.add_timing(phase_timings, "recovery", mark)
+
+        results = []
+        batch_rows = []
+        batch_keys = {}
+        for index, entry in enumerate(entries):
+            try:
+                if not isinstance(entry, dict):
+                    raise Exception("Entry must be an object")
+                values = build_row_data(entry)
+                result = {"index": index, "success": True}
+
+                # Duplicates of logged rows or of earlier entries in this batch
+                # (checked again when queued entries are written)
+                key = otj_store.entry_key(values)
+                duplicate_row = find_duplicate_row(values) if writable else None
+                if not entry.get('allowDuplicate'):
+                    if duplicate_row is not None:
+                        raise Exception(f"This entry is already logged in row {duplicate_row}")
+                    if key in batch_keys:
+                        raise Exception(f"Duplicate of entry {batch_keys[key]} in this batch")
+                if duplicate_row is not None:
+                    result["duplicate_row"] = duplicate_row
+                batch_keys.setdefault(key, index)
+
+                batch_rows.append(values)
+                results.append(result)
+            except Exception as e:
+                results.append({"index": index, "success": False, "error": str(e)})
+        mark = record_validate_timing(mark)
+
+        failed = [result for result in results if not result["success"]]
+        if failed:
+            log(f"Bridge - Batch rejected: {len(failed)} of {len(entries)} entries invalid", 2)
+            return {
+                "success": False,
+                "error": f"{len(failed)} of {len(entries)} entries failed validation - nothing was written",
+                "results": results
+            }
+
+        if not writable:
+            return queue_entries(list(zip(entries, batch_rows)), started)
+
+        rows = findBlankRows(len(batch_rows))
+        otj_xlsx.add_timing(phase_timings, "find_row", mark)
+        try:
+            save_log_rows(dict(zip(rows, batch_rows)))
+        except OSError as e:
+            if not workbook_in_use(e):
+                raise
+            # Locked since it was checked - queue the batch rather than lose it
+            return queue_entries(list(zip(entries, batch_rows)), started)
+
+        for result, row in zip(results, rows):
+            result["row"] = row
+
+        log(f"Bridge - Successfully wrote {len(rows)} batch entries to rows {rows[0]}-{rows[-1]}", 1)
+
+        return {
+            "success": True,
+            "message": f"Successfully added {len(rows)} entries",
+            "rows": rows,
+            "results": results,
+            "timings": report_phase_timings(started),
+            "lock": write_lock.stats()
+        }
+
+    except Exception as e:
+        error_msg = str(e)
+        log(f"Bridge Error: {error_msg}", 2)
+        return {
+            "success": False,
+            "error": error_msg
+        }
+    finally:
+        if write_lock is not None:
+            write_lock.release()
+
+def cohort_workbooks(source):
+    """List the workbooks of a cohort from a directory of .xlsx files, a manifest file or a list of paths.
+
+    A manifest is a JSON list of paths or a text file with one path per line
+    (blank lines and # comments skipped); relative paths are taken from its folder.
+    """
+    if isinstance(source, list):
+        base, paths = os.getcwd(), source
+    elif os.path.isdir(source):
+        workbooks = []
+        for folder, subfolders, files in os.walk(source):
+            subfolders.sort()
+            for name in sorted(files):
+                # Skip Excel's "~$" owner files and our own ".~" temp saves
+                if name.lower().endswith(".xlsx") and not name.startswith(("~$", ".~")):
+                    workbooks.append(os.path.join(folder, name))
+        return workbooks
+    elif os.path.isfile(source):
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source, 'r', encoding='utf-8') as f:
+            text = f.read()
+        if text.lstrip().startswith("["):
+            paths = json.loads(text)
+        else:
+            paths = [line.strip() for line in text.splitlines() if line.strip() and not line.strip().startswith("#")]
+    else:
+        raise Exception(f"Cohort directory or manifest not found: {source}")
+    return [os.path.join(base, str(workbook)) for workbook in paths]
+
+def check_workbook(workbook_path):
+    """Next free row, hours totals, KSB coverage and log problems for one workbook of a cohort.
+
+    Runs in a worker process, so it never raises - failures come back in the result.
+    """
+    started = time.perf_counter()
+    try:
+        # Searched from the top of the log - startingRow is a setting for the user's own workbook
+        next_row = otj_xlsx.next_blank_rows(workbook_path, otj_xlsx.FIRST_LOG_ROW, 1)[0]
+        summary, summary_cached = otj_reports.summary(workbook_path)
+        problems, problems_cached = otj_reports.problems(workbook_path)
+        coverage, coverage_cached = otj_reports.ksb_coverage(workbook_path)
+        return {
+            "path": workbook_path,
+            "success": True,
+            "next_row": next_row,
+            "total": summary["total"],
+            "by_academic_year": summary["by_academic_year"],
+            "problems": problems,
+            "ksb_coverage": {key: coverage[key] for key in ("covered", "total", "missing")},
+            "cached": summary_cached and problems_cached and coverage_cached,
+            "seconds": round(time.perf_counter() - started, 4)
+        }
+    except Exception as e:
+        return {
+            "path": workbook_path,
+            "success": False,
+            "error": str(e),
+            "seconds": round(time.perf_counter() - started, 4)
+        }
+
+def run_cohort(data, notify=None):
+    """Check every workbook of a cohort across a pool of worker processes.
+
+    Each workbook's result is passed to notify as soon as it is ready, in the
+    order they finish; the returned result lists them all in cohort order.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    if isinstance(data, dict):
+        source = data.get('directory') or data.get('manifest') or data.get('paths')
+        workers = data.get('workers')
+    else:
+        source, workers = data, None
+    if not source:
+        raise Exception("No cohort directory or manifest provided")
+
+    workbooks = cohort_workbooks(source)
+    if not workbooks:
+        raise Exception(f"No workbooks found in {source}")
+    workers = max(1, min(int(workers or os.cpu_count() or 1), len(workbooks)))
+
+    started = time.perf_counter()
+    results = {}
+    # Spawned rather than forked - the resident bridge has background threads running
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(check_workbook, workbook) for workbook in workbooks]
+        for future in as_completed(futures):
+            result = future.result()
+            results[result["path"]] = result
+            if notify is not None:
+                notify(result)
+
+    ordered = [results[workbook] for workbook in workbooks]
+    failed = sum(1 for result in ordered if not result["success"])
+    log(f"Bridge - Cohort of {len(workbooks)} workbooks checked with {workers} workers ({failed} failed)", 1)
     return {
-        "locations": [
-            "Home",
-            "Curzon Building, BCU City Centre",
-            "Millenium Point, BCU City Centre",
-            "SteamHouse, BCU City Centre",
-            "BBC London Broadcasting House",
-            "BBC Salford MediaCityUK",
-            "BBC Cymru Wales",
-            "BBC Scotland, Pacific Quay",
-            "BBC Belfast Broadcasting House",
-            "BBC Wood Norton",
-            "BBC Bristol"
-        ],
-        "activityTypes": [
-            "Annual Leave",
-            "Assignment Writing",
-            "Combination of activities",
-            "External Practice Exposure",
-            "Lecture",
-            "Other",
-            "Placement",
-            "Protected Learning",
-            "Reading",
-            "Research",
-            "Revision",
-            "Seminar",
-            "Tutorial",
-            "Work shadowing",
-            "Independent Study"
-        ],
-        "moduleCodes": [
-            "Not applicable",
-            "DIG4142",
-            "CMP4267",
-            "ENG4099",
-            "CMP4286",
-            "DIG4143",
-            "ENG4098",
-            "ENG5139",
-            "CMP5346",
-            "CMP5347",
-            "CMP5345",
-            "CMP5348",
-            "DIG5130",
-            "DIG6204",
-            "CMP6195",
-            "DIG6209",
-            "DIG6202",
-            "DIG6203"
-        ],
-        "declarationOptions": [
-            "Yes",
-            "No"
-        ],
-        "confirmationOptions": [
-            "Yes",
-            "No",
-            "Not applicable"
-        ]
+        "workbooks": len(workbooks),
+        "failed": failed,
+        "workers": workers,
+        "results": ordered,
+        "seconds": round(time.perf_counter() - started, 4)
     }
 
+def load_dropdown_options():
+    """Dropdown options for the workbook named in settings (see otj_options.py)"""
+    return otj_options.load_options(load_settings_from_electron().get('excelPath', ''))
+
+def get_dropdown_options():
+    """Return dropdown options for Electron UI"""
+    return load_dropdown_options().as_dict()
+
+class UnknownCommand(Exception):
+    """The command or JSON-RPC method isn't one the bridge handles"""
+
+def handle_command(command, data=None, notify=None):
+    """Run a single bridge command and return its JSON result.
+
+    notify, if given, is called with each partial result of commands that
+    stream them (cohort) before the final result is returned.
+    """
+    global path
+
+    if command == "get_options":
+        # Return dropdown options
+        return get_dropdown_options()
+
+    elif command == "process_data":
+        # Process form data
+        if data is None:
+            raise Exception("No data provided")
+        return process_form_data(data)
+
+    elif command == "process_batch":
+        # Process a list of form entries in one write
+        if data is None:
+            raise Exception("No data provided")
+        return process_batch(data)
+
+    elif command == "find_next_row":
+        # Find the next available row in Excel
+        settings = load_settings_from_electron()
+        excel_path = settings.get('excelPath', '')
+
+        if not excel_path:
+            raise Exception("Excel path not set in settings")
+
+        if not os.path.exists(excel_path):
+            raise Exception(f"Excel file not found: {excel_path}")
+
+        # Set global path for findFirstBlankRow to use
+        path = excel_path
+
+        try:
+            next_row = findFirstBlankRow()
+        except Exception as e:
+            raise Exception(f"Failed to find next row: {str(e)}")
+
+        return {
+            "row": next_row,
+            "starting_row": settings.get('startingRow', 125),
+            "excel_path": excel_path
+        }
+
+    elif command == "summary":
+        # Hours by academic year, month, module and activity type
+        path = get_excel_path()
+        result, cached = otj_reports.summary(path)
+        if not cached:
+            log("Bridge - Hours summary rebuilt", 1)
+        return dict(result, cached=cached)
+
+    elif command == "ksb_coverage":
+        # Evidence logged against each KSB on the "Broadcast & Media KSBs" sheet
+        path = get_excel_path()
+        result, cached = otj_reports.ksb_coverage(path)
+        if not cached:
+            log("Bridge - KSB coverage rebuilt", 1)
+        return dict(result, cached=cached)
+
+    elif command == "search":
+        # Find logged entries by words in their description, details or next steps
+        if data is None:
+            raise Exception("No search query provided")
+        query = data.get('query', '') if isinstance(data, dict) else str(data)
+        limit = int(data.get('limit', 20)) if isinstance(data, dict) else 20
+        path = get_excel_path()
+        otj_store.load()
+        start = time.perf_counter()
+        results = otj_store.search(path, query, limit)
+        return {
+            "query": query,
+            "results": results,
+            "seconds": round(time.perf_counter() - start, 4)
+        }
+
+    elif command == "reconcile":
+        # Bring the SQLite shadow store into line with the workbook, re-reading only changed rows
+        path = get_excel_path()
+        otj_store.load()
+        start = time.perf_counter()
+        synced = otj_store.reconcile(path)
+        log(f"Bridge - Shadow store holds {synced['entries']} entries "
+            f"({synced['changed']} changed, {synced['removed']} removed)", 1)
+        return {
+            "entries": synced["entries"],
+            "changed": synced["changed"],
+            "removed": synced["removed"],
+            "store": otj_store.store_path(path),
+            "seconds": round(time.perf_counter() - start, 4)
+        }
+
+    elif command == "flush_queue":
+        # Write entries queued while the workbook was unavailable now, if it can be written
+        path = get_excel_path()
+        if not workbook_writable(path):
+            raise Exception("Workbook is locked - close it in Excel and try again")
+        with lock_workbook():
+            written = flush_queue()
+        return {
+            "written": written,
+            "queue_length": len(otj_queue.pending(path))
+        }
+
+    elif command == "cohort":
+        # Next row, hours and log problems for every workbook in a directory or manifest
+        if data is None:
+            raise Exception("No cohort directory or manifest provided")
+        return run_cohort(data, notify)
+
+    elif command == "provision":
+        # Re-check required packages and refresh the environment marker
+        return provision_environment()
+
+    elif command == "test_connection":
+        # Test Python environment
+        settings = load_settings_from_electron()
+        return {
+            "python_version": sys.version,
+            "working_directory": os.getcwd(),
+            "settings_loaded": bool(settings),
+            "excel_path": settings.get('excelPath', 'Not set')
+        }
+
+    else:
+        raise UnknownCommand(f"Unknown command: {command}")
+
+def serve():
+    """Stay resident and answer newline-delimited JSON-RPC requests on stdin.
+
+    Each request is a single line such as
+    {"jsonrpc": "2.0", "id": 1, "method": "process_data", "params": {...}}
+    and gets exactly one response line carrying the same id, so Electron can
+    pipeline several requests without waiting. Requests are handled in the
+    order they arrive. The "shutdown" method (or closing stdin) stops the loop.
+    """
+    # Keep stray prints from command handlers out of the protocol stream
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+
+    def respond(message):
+        message["jsonrpc"] = "2.0"
+        protocol_out.write(json.dumps(message) + "\n")
+        protocol_out.flush()
+
+    log("Bridge - Serve mode started", 1)
+
+    # Finish any write an earlier run was killed in the middle of
+    try:
+        get_excel_path()
+        if otj_journal.pending(path):
+            with lock_workbook():
+                replay_journal()
+    except Exception as e:
+        log(f"Journal not checked: {str(e)}", 1)
+
+    # Entries queued while the workbook is unavailable are written in the background,
+    # never at the same time as a request
+    command_lock = threading.Lock()
+    threading.Thread(target=flush_queue_periodically, args=(command_lock,), name="queue-flush", daemon=True).start()
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            respond({"id": None, "error": {"code": -32700, "message": f"Parse error: {str(e)}"}})
+            continue
+
+        if not isinstance(request, dict):
+            respond({"id": None, "error": {"code": -32600, "message": "Invalid Request: expected a JSON object"}})
+            continue
+
+        request_id = request.get("id")
+        method = request.get("method")
+
+        if method == "shutdown":
+            respond({"id": request_id, "result": {"shutdown": True}})
+            break
+
+        try:
+            with command_lock:
+                # Partial results go out as notifications carrying the request id in their params
+                result = handle_command(method, request.get("params"), lambda partial: respond({
+                    "method": f"{method}_result", "params": dict(partial, request_id=request_id)
+                }))
+            respond({"id": request_id, "result": result})
+        except UnknownCommand:
+            respond({"id": request_id, "error": {"code": -32601, "message": f"Method not found: {method}"}})
+        except Exception as e:
+            respond({
+                "id": request_id,
+                "error": {"code": -32000, "message": str(e), "type": type(e).__name__}
+            })
+
+    log("Bridge - Serve mode stopped", 1)
+
+def report_timings(command_seconds=None):
+    """Print start-up (and command) timings to stderr as JSON"""
+    timings = {name: round(seconds, 4) for name, seconds in startup_timings.items()}
+    if command_seconds is not None:
+        timings["command"] = round(command_seconds, 4)
+    timings["total"] = round(time.perf_counter() - BRIDGE_START, 4)
+    print(json.dumps({"timings": timings}), file=sys.stderr)
+
 def main():
     """Main function - handle command line arguments"""
+    show_timings = "--timings" in sys.argv
+    if show_timings:
+        sys.argv.remove("--timings")
+
     if len(sys.argv) < 2:
         print(json.dumps({"error": "No command provided"}))
         sys.exit(1)
     
     command = sys.argv[1]
-    
+
+    if command == "serve":
+        if show_timings:
+            report_timings()
+        serve()
+        return
+
     try:
-        if command == "get_options":
-            # Return dropdown options
-            result = get_dropdown_options()
-            print(json.dumps(result))
-            
-        elif command == "process_data":
-            # Process form data
+        data = None
+        if command in ("process_data", "process_batch", "search", "cohort"):
             if len(sys.argv) < 3:
                 print(json.dumps({"error": "No data provided"}))
                 sys.exit(1)
-            
-            # Parse JSON data from command line
-            json_data = sys.argv[2]
-            data = json.loads(json_data)
-            
-            # Process the data
-            result = process_form_data(data)
-            print(json.dumps(result))
-            
-        elif command == "find_next_row":
-            # Find the next available row in Excel
-            settings = load_settings_from_electron()
-            excel_path = settings.get('excelPath', '')
-            
-            if not excel_path:
-                print(json.dumps({"error": "Excel path not set in settings"}))
-                sys.exit(1)
-                
-            if not os.path.exists(excel_path):
-                print(json.dumps({"error": f"Excel file not found: {excel_path}"}))
-                sys.exit(1)
-            
-            # Set global path for findFirstBlankRow to use
-            global path
-            path = excel_path
-            
-            try:
-                next_row = findFirstBlankRow()
-                result = {
-                    "row": next_row,
-                    "starting_row": settings.get('startingRow', 125),
-                    "excel_path": excel_path
-                }
-                print(json.dumps(result))
-            except Exception as e:
-                print(json.dumps({"error": f"Failed to find next row: {str(e)}"}))
-                sys.exit(1)
-                
-        elif command == "test_connection":
-            # Test Python environment
-            settings = load_settings_from_electron()
-            result = {
-                "python_version": sys.version,
-                "working_directory": os.getcwd(),
-                "settings_loaded": bool(settings),
-                "excel_path": settings.get('excelPath', 'Not set')
-            }
-            print(json.dumps(result))
-            
-        else:
-            print(json.dumps({"error": f"Unknown command: {command}"}))
-            sys.exit(1)
+
+            # Parse JSON data from command line (cohort also takes a bare directory or manifest path)
+            if command == "cohort" and not sys.argv[2].lstrip().startswith(("{", "[")):
+                data = sys.argv[2]
+            else:
+                data = json.loads(sys.argv[2])
+
+        def print_partial(partial):
+            # One JSON line per partial result ahead of the final one
+            print(json.dumps(partial), flush=True)
+
+        command_start = time.perf_counter()
+        result = handle_command(command, data, print_partial)
+        print(json.dumps(result))
+        if show_timings:
+            report_timings(time.perf_counter() - command_start)
             
     except Exception as e:
         error_result = {
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Sidecar caches for the OTJ workbook
+Data derived from the workbook (e.g. the module -> KSB index) is stored as JSON
+in the per-user bridge_cache folder (see data_dir) and keyed by a fingerprint of
+the workbook file, so it is only rebuilt when the workbook itself changes.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+APP_NAME = "Lecture Logger"
+
+# Where bridge_cache/ lived before it moved to the per-user folder
+LEGACY_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bridge_cache")
+
+
+def data_dir():
+    """Per-user folder for the caches, the journal and the offline queue.
+
+    The install folder can be read-only (an app bundle or a machine-wide
+    install) and the Windows installer deletes it on reinstall, so nothing is
+    kept beside the scripts. OTJ_DATA_DIR overrides the location.
+    """
+    override = os.environ.get("OTJ_DATA_DIR")
+    if override:
+        return os.path.abspath(override)
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(os.path.join("~", "AppData", "Local"))
+    elif sys.platform == "darwin":
+        base = os.path.expanduser(os.path.join("~", "Library", "Application Support"))
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser(os.path.join("~", ".local", "share"))
+    return os.path.join(base, APP_NAME, "bridge_cache")
+
+
+CACHE_DIR = data_dir()
+
+
+def file_hash(path):
+    """Return the SHA-1 of a file's contents"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def workbook_fingerprint(path):
+    """Return the size, mtime and content hash identifying a workbook version"""
+    stat = os.stat(path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha1": file_hash(path)
+    }
+
+
+def workbook_key(workbook_path):
+    """Short hash of the workbook's absolute path, used to name its sidecar files"""
+    return hashlib.sha1(os.path.abspath(workbook_path).encode('utf-8')).hexdigest()[:12]
+
+
+def cache_path(name, workbook_path, extension=".json"):
+    """Sidecar file holding cache 'name' for the given workbook"""
+    return os.path.join(CACHE_DIR, f"{name}-{workbook_key(workbook_path)}{extension}")
+
+
+def adopt_legacy(path):
+    """Move a sidecar file left in the old bridge_cache/ beside the scripts to path; returns path.
+
+    Used for the journal and queue, whose entries would otherwise be stranded
+    by an upgrade. Caches are simply rebuilt.
+    """
+    legacy = os.path.join(LEGACY_CACHE_DIR, os.path.basename(path))
+    if os.path.normcase(legacy) == os.path.normcase(path) or os.path.exists(path) or not os.path.exists(legacy):
+        return path
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        shutil.move(legacy, path)  # Copies when the two folders are on different drives
+    except OSError:
+        pass
+    return path
+
+
+def _read_entry(name, workbook_path):
+    try:
+        with open(cache_path(name, workbook_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_entry(name, workbook_path, entry):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        target = cache_path(name, workbook_path)
+        temp = target + ".tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(temp, target)
+        return True
+    except OSError:
+        # A cache that can't be written just means it gets rebuilt next time
+        return False
+
+
+def fingerprint_matches(stored, workbook_path):
+    """Check a stored fingerprint still describes the workbook on disk.
+
+    Size and mtime are checked first; the file is only hashed when they differ,
+    so a workbook that was merely touched or copied still matches. Returns
+    (matches, restamp) where restamp means the contents match under a new mtime.
+    """
+    try:
+        stat = os.stat(workbook_path)
+    except OSError:
+        return False, False
+
+    if stat.st_size == stored.get("size") and stat.st_mtime_ns == stored.get("mtime_ns"):
+        return True, False
+
+    if stat.st_size != stored.get("size") or file_hash(workbook_path) != stored.get("sha1"):
+        return False, False
+    return True, True
+
+
+def load_cache(name, workbook_path):
+    """Return the cached payload for workbook_path, or None if missing or stale"""
+    entry = _read_entry(name, workbook_path)
+    if not entry or "fingerprint" not in entry:
+        return None
+
+    matches, restamp = fingerprint_matches(entry["fingerprint"], workbook_path)
+    if not matches:
+        return None
+    if restamp:
+        # Same contents with a new mtime - re-key so the next check is a plain stat
+        refresh_cache(name, workbook_path)
+    return entry.get("payload")
+
+
+def load_cache_any_version(name, workbook_path):
+    """Return (payload, is_current) for a cache even if the workbook has changed since.
+
+    For data that can be re-verified cheaply against the workbook, such as the
+    next free row pointer, where a stale value is still a useful first guess.
+    """
+    entry = _read_entry(name, workbook_path)
+    if not entry or "fingerprint" not in entry:
+        return None, False
+    return entry.get("payload"), load_cache(name, workbook_path) is not None
+
+
+def save_cache(name, workbook_path, payload):
+    """Store payload for the workbook's current fingerprint"""
+    entry = {
+        "fingerprint": workbook_fingerprint(workbook_path),
+        "payload": payload
+    }
+    return _write_entry(name, workbook_path, entry)
+
+
+def refresh_cache(name, workbook_path):
+    """Re-key an existing cache to the workbook's current fingerprint.
+
+    Used after the bridge itself writes the workbook in a way that cannot
+    affect this cache, e.g. appending a log row leaves the KSB index valid.
+    """
+    entry = _read_entry(name, workbook_path)
+    if not entry:
+        return False
+    entry["fingerprint"] = workbook_fingerprint(workbook_path)
+    return _write_entry(name, workbook_path, entry)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Column-store snapshot of the OTJ log
+The entries of the "OTJ log" sheet are laid out once per workbook version as
+typed arrays - day ordinals for dates, doubles for durations and dictionary
+codes for the text columns reports group by - and saved as one file in
+bridge_cache/. The rows come from the SQLite shadow store, which reconciles
+only the rows changed since it last matched the workbook. Reports
+memory-map that file and work on whole columns instead of parsing the workbook
+cell by cell again.
+
+File layout: MAGIC, a 4-byte little-endian header length, the JSON header
+(fingerprint, row count, dictionaries and where each column starts), then the
+raw column data, each column aligned to 8 bytes.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from contextlib import closing
+from datetime import date
+
+import otj_cache
+import otj_store
+from otj_xlsx import KSB_SHEET, read_only_workbook
+
+SNAPSHOT_NAME = "log_columns"
+MAGIC = b"OTJCOL1\n"
+ALIGNMENT = 8
+
+# Text columns stored as dictionary codes, named as in the shadow store's entries table
+CATEGORIES = ["academic_year", "location", "activity_type", "module", "ksbs"]
+
+
+def snapshot_path(workbook_path):
+    """Snapshot file for the given workbook"""
+    return otj_cache.cache_path(SNAPSHOT_NAME, workbook_path, extension=".bin")
+
+
+def _code_type(size):
+    return 'H' if size <= 0xFFFF else 'I'
+
+
+def build_snapshot(workbook_path):
+    """Lay the logged entries out as columns and write the snapshot file.
+
+    Returns the file written: normally snapshot_path(), or a file of its own if
+    the old snapshot couldn't be replaced (still mapped by another process on Windows).
+    """
+    fingerprint = otj_cache.workbook_fingerprint(workbook_path)
+    rows = array('I')
+    days = array('i')
+    durations = array('d')
+    codes = {name: [] for name in CATEGORIES}
+    dictionaries = {name: {} for name in CATEGORIES}
+
+    with closing(otj_store.open_current(workbook_path)) as conn:
+        query = "SELECT row, day, duration, {} FROM entries ORDER BY row".format(", ".join(CATEGORIES))
+        for entry in conn.execute(query):
+            rows.append(entry["row"])
+            days.append(date.fromisoformat(entry["day"]).toordinal() if entry["day"] else 0)
+            durations.append(float("nan") if entry["duration"] is None else entry["duration"])
+            for name in CATEGORIES:
+                value = " ".join((entry[name] or "").split())
+                codes[name].append(dictionaries[name].setdefault(value, len(dictionaries[name])))
+
+    with read_only_workbook(workbook_path) as wb:
+        # The KSB list is on its own sheet; kept here so coverage needs no second parse
+        ksb_sheet = [str(value) for (value,) in wb[KSB_SHEET].iter_rows(min_col=2, max_col=2, values_only=True)
+                     if value is not None]
+
+    columns = {"row": rows, "day": days, "duration": durations}
+    for name in CATEGORIES:
+        columns[name] = array(_code_type(len(dictionaries[name])), codes[name])
+
+    header = {
+        "fingerprint": fingerprint,
+        "byteorder": sys.byteorder,
+        "rows": len(rows),
+        "dictionaries": {name: list(values) for name, values in dictionaries.items()},
+        "ksb_sheet": ksb_sheet,
+        "columns": {}
+    }
+
+    # Column offsets are relative to the end of the header, so they can be set before its length is known
+    offset = 0
+    for name, column in columns.items():
+        header["columns"][name] = {"type": column.typecode, "offset": offset, "length": len(column)}
+        offset += -(-len(column) * column.itemsize // ALIGNMENT) * ALIGNMENT
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_bytes += b" " * (-(len(MAGIC) + 4 + len(header_bytes)) % ALIGNMENT)
+
+    os.makedirs(otj_cache.CACHE_DIR, exist_ok=True)
+    target = snapshot_path(workbook_path)
+    temp = f"{target}.{os.getpid()}.tmp"
+    with open(temp, 'wb') as f:
+        f.write(MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+        for column in columns.values():
+            data = column.tobytes()
+            f.write(data + b"\0" * (-len(data) % ALIGNMENT))
+    try:
+        os.replace(temp, target)
+    except OSError:
+        return temp
+    return target
+
+
+class Snapshot:
+    """A memory-mapped snapshot; use as a context manager so the mapping is closed.
+
+    column(name) returns a read-only memoryview of the typed values, which
+    indexes, iterates and slices like an array without copying the data.
+    """
+
+    def __init__(self, file_path, temporary=False):
+        self.path = file_path
+        self.temporary = temporary  # Removed on close
+        self._file = open(file_path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError("Not a log snapshot")
+        (header_length,) = struct.unpack_from("<I", self._map, len(MAGIC))
+        self._data_start = len(MAGIC) + 4 + header_length
+        self.header = json.loads(self._map[len(MAGIC) + 4:self._data_start].decode('utf-8'))
+        self.rows = self.header["rows"]
+        self.dictionaries = self.header["dictionaries"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def column(self, name):
+        """Typed values of one column, one per logged entry"""
+        spec = self.header["columns"][name]
+        start = self._data_start + spec["offset"]
+        raw = memoryview(self._map)[start:start + spec["length"] * array(spec["type"]).itemsize]
+        view = raw.cast(spec["type"])
+        self._views += [view, raw]
+        return view
+
+    def close(self):
+        """Release every column view and unmap the file"""
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._map.close()
+        self._file.close()
+        if self.temporary:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+def _current(file_path, workbook_path):
+    """Open the snapshot at file_path if it still matches the workbook, else None"""
+    try:
+        snapshot = Snapshot(file_path)
+    except (OSError, ValueError):
+        return None
+    matches, _ = otj_cache.fingerprint_matches(snapshot.header["fingerprint"], workbook_path)
+    if matches and snapshot.header.get("byteorder") == sys.byteorder:
+        return snapshot
+    snapshot.close()
+    return None
+
+
+def open_snapshot(workbook_path):
+    """Return the workbook's snapshot, building it first if it is missing or out of date"""
+    file_path = snapshot_path(workbook_path)
+    snapshot = _current(file_path, workbook_path)
+    if snapshot is None:
+        written = build_snapshot(workbook_path)
+        snapshot = Snapshot(written, temporary=written != file_path)
+    return snapshot
+
+
+def group_totals(codes, size, *columns):
+    """Row count and the sum of each value column per dictionary code - a bincount over the codes.
+
+    Returns (counts, [totals for each column]), each a list indexed by code.
+    """
+    counts = [0] * size
+    totals = [[0.0] * size for _ in columns]
+    for index, code in enumerate(codes):
+        counts[code] += 1
+        for total, column in zip(totals, columns):
+            total[code] += column[index]
+    return counts, totals
+
+
+def group_max(codes, size, values, initial=0):
+    """Largest value per dictionary code, or initial for codes with no rows"""
+    largest = [initial] * size
+    for code, value in zip(codes, values):
+        if value > largest[code]:
+            largest[code] = value
+    return largest
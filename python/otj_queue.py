@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Offline queue of form entries
+When the workbook can't be written (open in Excel, or on a OneDrive folder
+that is offline) entries are appended to a queue file in the per-user
+bridge_cache folder (see otj_cache.data_dir) and accepted straight away. The bridge writes them to the workbook, oldest first
+and in one save, once it can.
+"""
+
+import json
+import os
+import uuid
+from datetime import datetime
+
+import otj_cache
+
+QUEUE_NAME = "queue"
+
+
+def queue_path(workbook_path):
+    """Queue file for entries waiting to be written to the given workbook"""
+    return otj_cache.adopt_legacy(otj_cache.cache_path(QUEUE_NAME, workbook_path, extension=".jsonl"))
+
+
+def _append(workbook_path, records):
+    os.makedirs(otj_cache.CACHE_DIR, exist_ok=True)
+    with open(queue_path(workbook_path), 'a', encoding='utf-8') as f:
+        f.write("".join(json.dumps(record) + "\n" for record in records))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def enqueue(workbook_path, entries):
+    """Queue form entries (dicts as sent by Electron); returns their ids"""
+    records = [{"id": uuid.uuid4().hex, "queued": datetime.now().isoformat(), "entry": entry} for entry in entries]
+    _append(workbook_path, records)
+    return [record["id"] for record in records]
+
+
+def pending(workbook_path):
+    """Return [(id, entry)] still waiting to be written, oldest first"""
+    try:
+        with open(queue_path(workbook_path), 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+    except OSError:
+        return []
+
+    entries = {}
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # Torn last line from an interrupted append
+        if record.get("done"):
+            entries.pop(record.get("id"), None)
+        elif "entry" in record:
+            entries[record["id"]] = record["entry"]
+    return list(entries.items())
+
+
+def mark_done(workbook_path, ids):
+    """Record queued entries as written (or dropped); the file goes once nothing is left"""
+    if not ids:
+        return
+    _append(workbook_path, [{"id": entry_id, "done": True} for entry_id in ids])
+    if not pending(workbook_path):
+        try:
+            os.remove(queue_path(workbook_path))
+        except OSError:
+            pass
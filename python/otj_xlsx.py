@@ -0,0 +1,662 @@
+#!/usr/bin/env python3
+"""
+Fast access to the OTJ workbook
+Read-only openpyxl scans that walk a worksheet row by row instead of building
+the full cell model, a row-patch writer that updates single rows without
+re-saving the whole workbook, and a hashing scan of the log's raw XML that
+lets callers find the rows changed since they last looked. Shared by electron_bridge.py and OTJ_Automation.py.
+"""
+
+import hashlib
+import html
+import os
+import posixpath
+import re
+import struct
+import time
+from datetime import datetime
+import warnings
+import zipfile
+import zlib
+from contextlib import contextmanager
+from xml.etree import ElementTree
+
+warnings.simplefilter("ignore", UserWarning)
+
+from openpyxl import load_workbook
+
+import otj_cache
+
+LOG_SHEET = "OTJ log"
+KSB_SHEET = "Broadcast & Media KSBs"
+DATE_COLUMN = 3  # Column C - a row is in use once it has a date
+FIRST_LOG_ROW = 18  # Entries start below the header and example rows
+ENTRY_COLUMNS = 12  # Columns C-N hold one entry; O onwards are formulas
+NEXT_ROW_CACHE = "next_row"
+
+
+@contextmanager
+def read_only_workbook(path):
+    """Open a workbook for streaming reads and close its file handle afterwards"""
+    wb = load_workbook(path, read_only=True)
+    try:
+        yield wb
+    finally:
+        wb.close()
+
+
+def iter_column(sheet, col, start_row=1, end_row=None):
+    """Yield (row number, value) pairs down one column of a worksheet.
+
+    Works on read-only and regular worksheets; rows missing from the sheet
+    XML are yielded with a value of None.
+    """
+    rows = sheet.iter_rows(min_row=start_row, max_row=end_row, min_col=col, max_col=col, values_only=True)
+    for row, values in enumerate(rows, start=start_row):
+        yield row, values[0] if values else None
+
+
+def iter_log_entries(sheet):
+    """Yield (row number, [values of columns C-N]) for every dated row of the OTJ log"""
+    rows = sheet.iter_rows(min_row=FIRST_LOG_ROW, min_col=DATE_COLUMN,
+                           max_col=DATE_COLUMN + ENTRY_COLUMNS - 1, values_only=True)
+    for row, values in enumerate(rows, start=FIRST_LOG_ROW):
+        if values and values[0] is not None and str(values[0]).strip():
+            values = list(values) + [None] * (ENTRY_COLUMNS - len(values))
+            yield row, values
+
+
+def log_date(value):
+    """Return the datetime of a log date cell (a real date or DD/MM/YYYY text), or None"""
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.strptime(str(value).strip(), "%d/%m/%Y")
+    except ValueError:
+        return None
+
+
+def log_number(value):
+    """Return a numeric cell (e.g. a duration) as a float, or None"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def find_blank_rows(sheet, col, start_row, count):
+    """Return the first count rows at or below start_row with nothing in column col"""
+    blanks = []
+    row = start_row - 1
+    for row, value in iter_column(sheet, col, start_row):
+        if value is None:
+            blanks.append(row)
+            if len(blanks) == count:
+                return blanks
+    # Past the end of the sheet every row is blank
+    while len(blanks) < count:
+        row += 1
+        blanks.append(row)
+    return blanks
+
+
+# =============================================================================
+# Row-patch writer
+# Writing a handful of cells through openpyxl means re-serialising every part of
+# the workbook. patch_rows() instead rewrites only the affected <row> elements of
+# one worksheet part and copies every other zip member's compressed bytes as-is.
+# =============================================================================
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+# Characters that are not allowed in XML 1.0 (openpyxl rejects them too)
+ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+CELL_PATTERN = rb'<c\b[^>]*?\br="([A-Z]+)%d"[^>]*?(?:/>|>.*?</c>)'
+STYLE_PATTERN = re.compile(rb'\bs="(\d+)"')
+CALC_PR_PATTERN = re.compile(rb'<calcPr\b([^>]*?)(/?)>')
+
+
+class RowPatchError(Exception):
+    """The workbook layout isn't one patch_rows() can edit safely - use openpyxl instead"""
+
+
+def column_letter(col):
+    """Convert a 1-based column number to its letter(s), e.g. 3 -> 'C'"""
+    letters = ""
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def column_number(letters):
+    """Convert column letter(s) to a 1-based column number, e.g. 'C' -> 3"""
+    col = 0
+    for letter in letters:
+        col = col * 26 + ord(letter) - 64
+    return col
+
+
+def sheet_part_name(zf, sheet_name):
+    """Return the zip member holding the named worksheet"""
+    workbook = ElementTree.fromstring(zf.read("xl/workbook.xml"))
+    rels = ElementTree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+
+    rel_id = None
+    for sheet in workbook.iter(f"{{{MAIN_NS}}}sheet"):
+        if sheet.get("name") == sheet_name:
+            rel_id = sheet.get(f"{{{REL_NS}}}id")
+            break
+    if rel_id is None:
+        raise RowPatchError(f"Sheet '{sheet_name}' not found in workbook.xml")
+
+    for rel in rels.iter(f"{{{PKG_REL_NS}}}Relationship"):
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target")
+            if target.startswith("/"):
+                return target.lstrip("/")
+            return posixpath.normpath(posixpath.join("xl", target))
+    raise RowPatchError(f"No relationship '{rel_id}' for sheet '{sheet_name}'")
+
+
+def _escape(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _cell_xml(ref, style, value):
+    """Serialise one cell, keeping its existing style index"""
+    style_attr = b' s="%s"' % style if style else b""
+    ref = ref.encode("ascii")
+
+    if value is None or value == "":
+        return b'<c r="%s"%s/>' % (ref, style_attr)
+    if isinstance(value, bool):
+        return b'<c r="%s"%s t="b"><v>%d</v></c>' % (ref, style_attr, int(value))
+    if isinstance(value, (int, float)):
+        return b'<c r="%s"%s t="n"><v>%s</v></c>' % (ref, style_attr, repr(value).encode("ascii"))
+    if isinstance(value, str):
+        if ILLEGAL_XML_CHARS.search(value):
+            raise RowPatchError("Value contains characters that are not valid in XML")
+        # Inline strings leave sharedStrings.xml untouched
+        text = _escape(value).encode("utf-8")
+        return b'<c r="%s"%s t="inlineStr"><is><t xml:space="preserve">%s</t></is></c>' % (ref, style_attr, text)
+    raise RowPatchError(f"Unsupported cell value type: {type(value).__name__}")
+
+
+def _patch_row(sheet_xml, row, values, start_col):
+    """Return sheet_xml with values written into row from column start_col onwards"""
+    row_match = re.search(rb'<row\b[^>]*?\br="%d"[^>]*?(/?)>' % row, sheet_xml)
+    if not row_match:
+        raise RowPatchError(f"Row {row} does not exist in the sheet XML")
+
+    if row_match.group(1):
+        # Self-closing <row .../> - open it up so cells can go inside
+        row_open = row_match.group(0)[:-2] + b">"
+        content_start = content_end = row_match.end()
+        row_close = b"</row>"
+        replace_end = row_match.end()
+    else:
+        row_open = row_match.group(0)
+        content_start = row_match.end()
+        content_end = sheet_xml.find(b"</row>", content_start)
+        if content_end == -1:
+            raise RowPatchError(f"Row {row} is not closed")
+        row_close = b""
+        replace_end = content_end
+
+    content = sheet_xml[content_start:content_end]
+    cell_pattern = re.compile(CELL_PATTERN % row, re.DOTALL)
+    cells = {}
+    for cell_match in cell_pattern.finditer(content):
+        cells[column_number(cell_match.group(1).decode("ascii"))] = cell_match.group(0)
+
+    # Anything besides <c> elements inside the row means an unfamiliar layout
+    if cell_pattern.sub(b"", content).strip():
+        raise RowPatchError(f"Row {row} contains unexpected XML")
+
+    for offset, value in enumerate(values):
+        col = start_col + offset
+        style = None
+        if col in cells:
+            style_match = STYLE_PATTERN.search(cells[col].split(b">", 1)[0])
+            style = style_match.group(1) if style_match else None
+        cells[col] = _cell_xml(f"{column_letter(col)}{row}", style, value)
+
+    new_content = b"".join(cells[col] for col in sorted(cells))
+    return sheet_xml[:row_match.start()] + row_open + new_content + row_close + sheet_xml[replace_end:]
+
+
+def _force_recalculation(workbook_xml):
+    """Ask Excel to recalculate formulas on open, as openpyxl-saved files do"""
+    match = CALC_PR_PATTERN.search(workbook_xml)
+    if match is None:
+        return workbook_xml.replace(b"</workbook>", b'<calcPr fullCalcOnLoad="1"/></workbook>', 1)
+    if b"fullCalcOnLoad" in match.group(1):
+        return workbook_xml
+    patched = b'<calcPr%s fullCalcOnLoad="1"%s>' % (match.group(1), match.group(2))
+    return workbook_xml[:match.start()] + patched + workbook_xml[match.end():]
+
+
+def _dos_datetime(date_time):
+    year, month, day, hour, minute, second = date_time
+    return ((hour << 11) | (minute << 5) | (second // 2),
+            ((max(year, 1980) - 1980) << 9) | (month << 5) | day)
+
+
+def _write_zip(source_path, target_path, replacements):
+    """Copy a zip member by member, swapping in replacements {name: bytes}.
+
+    Untouched members keep their original compressed bytes; only replaced
+    members are compressed again.
+    """
+    with zipfile.ZipFile(source_path) as zf, open(source_path, "rb") as src, open(target_path, "wb") as out:
+        central = []
+        for info in zf.infolist():
+            if info.flag_bits & 0x1:
+                raise RowPatchError("Encrypted workbooks are not supported")
+            if info.file_size >= 0xFFFFFFFF or info.compress_size >= 0xFFFFFFFF or info.header_offset >= 0xFFFFFFFF:
+                raise RowPatchError("ZIP64 workbooks are not supported")
+
+            if info.filename in replacements:
+                data = replacements[info.filename]
+                crc = zlib.crc32(data) & 0xFFFFFFFF
+                size = len(data)
+                method = zipfile.ZIP_DEFLATED
+                compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+                payload = compressor.compress(data) + compressor.flush()
+            else:
+                src.seek(info.header_offset)
+                header = src.read(30)
+                if header[:4] != b"PK\x03\x04":
+                    raise RowPatchError(f"Bad local header for {info.filename}")
+                name_len, extra_len = struct.unpack("<HH", header[26:30])
+                src.seek(info.header_offset + 30 + name_len + extra_len)
+                payload = src.read(info.compress_size)
+                crc, size, method = info.CRC, info.file_size, info.compress_type
+
+            name = info.filename.encode("utf-8" if info.flag_bits & 0x800 else "cp437")
+            flags = info.flag_bits & 0x806  # Keep UTF-8 name and compression level bits only
+            dos_time, dos_date = _dos_datetime(info.date_time)
+            offset = out.tell()
+
+            out.write(struct.pack("<4sHHHHHIIIHH", b"PK\x03\x04", info.extract_version, flags, method,
+                                  dos_time, dos_date, crc, len(payload), size, len(name), 0))
+            out.write(name)
+            out.write(payload)
+
+            central.append(struct.pack("<4sHHHHHHIIIHHHHHII", b"PK\x01\x02", info.create_version | (info.create_system << 8),
+                                       info.extract_version, flags, method, dos_time, dos_date, crc, len(payload), size,
+                                       len(name), 0, 0, 0, info.internal_attr, info.external_attr, offset) + name)
+
+        directory_offset = out.tell()
+        directory = b"".join(central)
+        out.write(directory)
+        out.write(struct.pack("<4sHHHHIIH", b"PK\x05\x06", 0, 0, len(central), len(central),
+                              len(directory), directory_offset, 0))
+        # On disk before the rename makes it the workbook
+        out.flush()
+        os.fsync(out.fileno())
+
+
+def temp_path_for(path):
+    """Hidden file beside path that a new version is written to before replacing it"""
+    return os.path.join(os.path.dirname(os.path.abspath(path)), f".~{os.path.basename(path)}.tmp")
+
+
+def save_workbook(wb, path):
+    """Save an openpyxl workbook without ever leaving a half-written file at path.
+
+    The workbook is saved to a temporary file in the same directory, flushed
+    to disk and then renamed over the original in one atomic step.
+    """
+    temp_path = temp_path_for(path)
+    try:
+        wb.save(temp_path)
+        with open(temp_path, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def add_timing(timings, phase, start):
+    """Add the seconds since start (a perf_counter value) to timings[phase]; returns the new perf_counter"""
+    now = time.perf_counter()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + now - start
+    return now
+
+
+def patch_rows(path, sheet_name, rows, start_col=DATE_COLUMN, timings=None):
+    """Write {row number: [values]} into a worksheet by patching its XML in place.
+
+    Values are written from start_col onwards, keeping each cell's style.
+    Raises RowPatchError, leaving the file untouched, when the workbook isn't
+    laid out the way this writer expects; callers then fall back to openpyxl.
+    If a timings dict is given, the seconds spent reading ("load"), patching
+    ("write") and writing the file ("save") are added to it.
+    """
+    mark = time.perf_counter()
+    try:
+        with zipfile.ZipFile(path) as zf:
+            part = sheet_part_name(zf, sheet_name)
+            sheet_xml = zf.read(part)
+            workbook_xml = zf.read("xl/workbook.xml")
+    except (KeyError, zipfile.BadZipFile, ElementTree.ParseError) as e:
+        raise RowPatchError(f"Unable to read workbook structure: {str(e)}")
+
+    mark = add_timing(timings, "load", mark)
+
+    for row, values in sorted(rows.items()):
+        sheet_xml = _patch_row(sheet_xml, row, values, start_col)
+
+    replacements = {part: sheet_xml}
+    patched_workbook_xml = _force_recalculation(workbook_xml)
+    if patched_workbook_xml != workbook_xml:
+        replacements["xl/workbook.xml"] = patched_workbook_xml
+    mark = add_timing(timings, "write", mark)
+
+    temp_path = temp_path_for(path)
+    try:
+        _write_zip(path, temp_path, replacements)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    add_timing(timings, "save", mark)
+
+
+# =============================================================================
+# Next free row pointer
+# The first blank row is remembered in a sidecar cache. On use it is verified
+# against the raw sheet XML with one or two cell checks; only when that fails
+# is column C searched again, galloping then bisecting since the log is filled
+# from the top down.
+# =============================================================================
+
+def read_sheet_xml(path, sheet_name):
+    """Return the raw XML of one worksheet"""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            sheet_xml = zf.read(sheet_part_name(zf, sheet_name))
+    except (KeyError, zipfile.BadZipFile, ElementTree.ParseError) as e:
+        raise RowPatchError(f"Unable to read workbook structure: {str(e)}")
+
+    # Cell checks match unprefixed <c> elements; anything else could read as blank
+    if not re.search(rb"<sheetData\b", sheet_xml):
+        raise RowPatchError("Unexpected worksheet XML layout")
+    return sheet_xml
+
+
+def cell_has_value(sheet_xml, col, row):
+    """Check whether a cell holds a value, formula or non-empty string in the sheet XML"""
+    match = re.search(rb'<c\b[^>]*?\br="%s%d"[^>]*?(/?)>' % (column_letter(col).encode("ascii"), row), sheet_xml)
+    if not match or match.group(1):
+        return False
+    end = sheet_xml.find(b"</c>", match.end())
+    inner = sheet_xml[match.end():end]
+    return bool(re.search(rb"<f\b|<v>[^<]|<t\b[^>]*>[^<]", inner))
+
+
+def gallop_first_blank(sheet_xml, col, start_row):
+    """Find a blank row at or after start_row whose previous row is filled.
+
+    Doubles the step until a blank row is found, then bisects back to the
+    boundary - O(log n) cell checks when the data is contiguous. With gaps in
+    the data the result is still a blank row, just not necessarily the first.
+    """
+    if not cell_has_value(sheet_xml, col, start_row):
+        return start_row
+
+    filled, step = start_row, 1
+    while cell_has_value(sheet_xml, col, start_row + step):
+        filled = start_row + step
+        step *= 2
+    blank = start_row + step
+
+    while blank - filled > 1:
+        middle = (filled + blank) // 2
+        if cell_has_value(sheet_xml, col, middle):
+            filled = middle
+        else:
+            blank = middle
+    return blank
+
+
+def next_blank_rows(path, start_row, count=1):
+    """Return the next count free rows of the OTJ log at or below start_row.
+
+    The cached pointer is trusted after checking its cell is still blank and,
+    if the workbook changed since it was stored, that the row above is filled.
+    """
+    try:
+        sheet_xml = read_sheet_xml(path, LOG_SHEET)
+    except RowPatchError:
+        with read_only_workbook(path) as wb:
+            return find_blank_rows(wb[LOG_SHEET], DATE_COLUMN, start_row, count)
+
+    pointer, is_current = otj_cache.load_cache_any_version(NEXT_ROW_CACHE, path)
+    first = None
+    if pointer and pointer.get("start_row") == start_row:
+        row = pointer.get("row", 0)
+        if row >= start_row and not cell_has_value(sheet_xml, DATE_COLUMN, row):
+            if is_current or row == start_row or cell_has_value(sheet_xml, DATE_COLUMN, row - 1):
+                first = row
+
+    if first is None:
+        first = gallop_first_blank(sheet_xml, DATE_COLUMN, start_row)
+        otj_cache.save_cache(NEXT_ROW_CACHE, path, {"row": first, "start_row": start_row})
+
+    rows = []
+    row = first
+    while len(rows) < count:
+        if not cell_has_value(sheet_xml, DATE_COLUMN, row):
+            rows.append(row)
+        row += 1
+    return rows
+
+
+def remember_next_row(path, start_row, row):
+    """Store row as the next free row for the workbook as it is now"""
+    otj_cache.save_cache(NEXT_ROW_CACHE, path, {"row": row, "start_row": start_row})
+
+
+# =============================================================================
+# Log row scan
+# LogScan reads the OTJ log's rows straight from the sheet XML and hashes the
+# raw XML of columns C-N of each one, which is cheap enough to do for the whole
+# log. Callers compare those hashes with ones stored earlier and only look
+# closer at the rows that differ: content_digest() hashes what a row holds,
+# ignoring how it is written (an inline or a shared string, say), and values()
+# decodes it the way openpyxl's read-only mode would.
+# =============================================================================
+
+ROW_START_PATTERN = re.compile(rb'<row\b[^>]*?\br="(\d+)"[^>]*?(/?)>')
+CELL_XML_PATTERN = re.compile(rb'<c\b([^>]*?)(?:/>|>(.*?)</c>)', re.DOTALL)
+CELL_REF_PATTERN = re.compile(rb'\br="([A-Z]+)\d+"')
+CELL_TYPE_PATTERN = re.compile(rb'\bt="(\w+)"')
+# Excel and openpyxl both write r first; the scan finds cells by it
+UNORDERED_CELL_PATTERN = re.compile(rb'<c\s+(?!r=")')
+PAST_ENTRY_PATTERN = re.compile(rb'<c r="(?:[O-Z]|[A-Z]{2})')
+DATE_CELL_VALUE_PATTERN = re.compile(rb'<c r="C\d+"[^>]*?(?:/>|>(.*?)</c>)', re.DOTALL)
+VALUE_PATTERN = re.compile(rb'<v>(.*?)</v>', re.DOTALL)
+FORMULA_PATTERN = re.compile(rb'<f\b[^>]*>(.+?)</f>', re.DOTALL)
+TEXT_PATTERN = re.compile(rb'<t(?:\s[^>]*)?>(.*?)</t>', re.DOTALL)
+PHONETIC_PATTERN = re.compile(rb'<rPh\b.*?</rPh>', re.DOTALL)
+SHARED_STRING_PATTERN = re.compile(rb'<si>(.*?)</si>|<si/>', re.DOTALL)
+DATE_1904_PATTERN = re.compile(rb'<workbookPr\b[^>]*\bdate1904="(?:1|true)"')
+
+
+def _part_path(zf, rel_type):
+    """Zip member the workbook relationship of the given type points to, or None"""
+    rels = ElementTree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.iter(f"{{{PKG_REL_NS}}}Relationship"):
+        if rel.get("Type", "").endswith(f"/{rel_type}"):
+            target = rel.get("Target")
+            return target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+    return None
+
+
+def _shared_strings(zf):
+    """Raw (still escaped) text of each shared string, phonetic runs left out"""
+    part = _part_path(zf, "sharedStrings")
+    if part is None or part not in zf.namelist():
+        return []
+    return [b"".join(TEXT_PATTERN.findall(PHONETIC_PATTERN.sub(b"", match.group(1) or b"")))
+            for match in SHARED_STRING_PATTERN.finditer(zf.read(part))]
+
+
+def _date_styles(zf):
+    """Indexes of the cell styles whose number format shows a date"""
+    from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format
+
+    part = _part_path(zf, "styles")
+    if part is None or part not in zf.namelist():
+        return set()
+    styles = ElementTree.fromstring(zf.read(part))
+    formats = dict(BUILTIN_FORMATS)
+    for fmt in styles.iter(f"{{{MAIN_NS}}}numFmt"):
+        formats[int(fmt.get("numFmtId"))] = fmt.get("formatCode", "")
+    cell_xfs = styles.find(f"{{{MAIN_NS}}}cellXfs")
+    if cell_xfs is None:
+        return set()
+    return {index for index, xf in enumerate(cell_xfs.iter(f"{{{MAIN_NS}}}xf"))
+            if is_date_format(formats.get(int(xf.get("numFmtId", 0)), ""))}
+
+
+def _xml_text(raw):
+    from openpyxl.utils.escape import unescape
+    return unescape(html.unescape(raw.decode("utf-8")))
+
+
+class LogScan:
+    """The OTJ log's rows with a date in column C, as found in the sheet XML.
+
+    raw_digests maps row number -> hex digest of the raw XML of the row's
+    columns C-N. Raises RowPatchError when the workbook isn't laid out the
+    way the scan expects; callers then read it with openpyxl instead.
+    """
+
+    def __init__(self, path):
+        try:
+            with zipfile.ZipFile(path) as zf:
+                part = sheet_part_name(zf, LOG_SHEET)
+                self._zip_path = path
+                self._sheet_xml = zf.read(part)
+                self._workbook_xml = zf.read("xl/workbook.xml")
+        except (KeyError, zipfile.BadZipFile, ElementTree.ParseError) as e:
+            raise RowPatchError(f"Unable to read workbook structure: {str(e)}")
+        if not re.search(rb"<sheetData\b", self._sheet_xml) or UNORDERED_CELL_PATTERN.search(self._sheet_xml):
+            raise RowPatchError("Unexpected worksheet XML layout")
+
+        self._entries = {}  # Row number -> raw XML of its cells in columns C-N
+        self.raw_digests = {}
+        sheet_xml = self._sheet_xml
+        position = 0
+        while True:
+            row_match = ROW_START_PATTERN.search(sheet_xml, position)
+            if row_match is None:
+                break
+            position = row_match.end()
+            if row_match.group(2):
+                continue  # Empty <row .../>
+            row_end = sheet_xml.find(b"</row>", position)
+            if row_end == -1:
+                raise RowPatchError("Row is not closed")
+            row = int(row_match.group(1))
+            content_start, position = position, row_end
+            if row < FIRST_LOG_ROW:
+                continue
+            content = sheet_xml[content_start:row_end]
+            start = content.find(b'<c r="C')
+            if start == -1:
+                continue
+            end = PAST_ENTRY_PATTERN.search(content, start)
+            cells = content[start:end.start() if end else len(content)]
+            date_cell = DATE_CELL_VALUE_PATTERN.match(cells)
+            if not date_cell or not re.search(rb"<f\b|<v>[^<]|<t\b[^>]*>[^<]", date_cell.group(1) or b""):
+                continue  # Column C is empty - not an entry
+            self._entries[row] = cells
+            self.raw_digests[row] = hashlib.sha1(cells).hexdigest()
+        self._context = None
+        self._parsed = {}
+
+    def _load_context(self):
+        """Shared strings, date styles and date system - only needed once a row is decoded"""
+        if self._context is None:
+            try:
+                with zipfile.ZipFile(self._zip_path) as zf:
+                    self._context = (_shared_strings(zf), _date_styles(zf),
+                                     bool(DATE_1904_PATTERN.search(self._workbook_xml)))
+            except (KeyError, zipfile.BadZipFile, ElementTree.ParseError) as e:
+                raise RowPatchError(f"Unable to read workbook structure: {str(e)}")
+        return self._context
+
+    def _cells(self, row):
+        """{column offset from C: (kind, raw text, shown as a date)} for the cells of a row holding a value"""
+        if row in self._parsed:
+            return self._parsed[row]
+        shared, date_styles, _ = self._load_context()
+        cells = self._parsed[row] = {}
+        for cell_match in CELL_XML_PATTERN.finditer(self._entries[row]):
+            attrs, inner = cell_match.groups()
+            if not inner:
+                continue
+            col = column_number(CELL_REF_PATTERN.search(attrs).group(1).decode("ascii")) - DATE_COLUMN
+            kind_match = CELL_TYPE_PATTERN.search(attrs)
+            kind = kind_match.group(1) if kind_match else b"n"
+            formula = FORMULA_PATTERN.search(inner)
+            if formula:
+                cells[col] = (b"f", formula.group(1), 0)
+                continue
+            if kind == b"inlineStr":
+                texts = TEXT_PATTERN.findall(PHONETIC_PATTERN.sub(b"", inner))
+                if texts:
+                    cells[col] = (b"str", b"".join(texts), 0)
+                continue
+            value = VALUE_PATTERN.search(inner)
+            if value is None or not value.group(1):
+                continue
+            if kind == b"s":
+                try:
+                    cells[col] = (b"str", shared[int(value.group(1))], 0)
+                except (ValueError, IndexError):
+                    raise RowPatchError(f"Shared string index out of range in row {row}")
+                continue
+            style = STYLE_PATTERN.search(attrs)
+            is_date = kind == b"n" and style is not None and int(style.group(1)) in date_styles
+            cells[col] = (kind, value.group(1), int(is_date))
+        return cells
+
+    def content_digest(self, row):
+        """Hex digest of what a row holds: each cell's value, with shared strings resolved, and whether it is a date"""
+        _, _, date1904 = self._load_context()
+        return hashlib.sha1((b"1904" if date1904 else b"") + b"\x1e".join(
+            b"%d\x1f%s\x1f%s\x1f%d" % (col, kind, text, is_date)
+            for col, (kind, text, is_date) in sorted(self._cells(row).items()))).hexdigest()
+
+    def values(self, row):
+        """[values of columns C-N] of a scanned row, as iter_log_entries() would yield them"""
+        from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel
+
+        _, _, date1904 = self._load_context()
+        values = [None] * ENTRY_COLUMNS
+        for col, (kind, text, is_date) in self._cells(row).items():
+            if kind == b"f":
+                values[col] = "=" + _xml_text(text)
+            elif kind in (b"str", b"e"):
+                values[col] = _xml_text(text)
+            elif kind == b"b":
+                values[col] = text == b"1"
+            elif kind == b"d":
+                values[col] = datetime.fromisoformat(text.decode("ascii").rstrip("Z"))
+            else:
+                number = text.decode("ascii")
+                number = float(number) if "." in number or "E" in number or "e" in number else int(number)
+                if is_date:
+                    number = from_excel(number, CALENDAR_MAC_1904 if date1904 else CALENDAR_WINDOWS_1900)
+                values[col] = number
+        return values
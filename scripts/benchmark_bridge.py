@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the Python bridge (python/electron_bridge.py)
+Runs bridge commands against a scratch copy of an OTJ workbook and reports
+how many times the workbook is parsed, how long each step takes and what
+the bridge imports before answering commands that never open the workbook.
+
+Usage: python scripts/benchmark_bridge.py [path/to/workbook.xlsx]
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PYTHON_DIR = os.path.join(REPO_DIR, "python")
+DEFAULT_WORKBOOK = os.path.join(PYTHON_DIR, "OTJ for Python.xlsx")
+
+sys.path.insert(0, PYTHON_DIR)
+import electron_bridge  # noqa: E402
+
+SAMPLE_ENTRY = {
+    "date": "01/10/2025",
+    "location": "Home",
+    "activityType": "Lecture",
+    "moduleCode": "DIG4143",
+    "description": "Benchmark entry",
+    "details": "Written by scripts/benchmark_bridge.py",
+    "nextSteps": "",
+    "duration": "1.5",
+    "declaration": "Yes"
+}
+
+
+def count_loads(func, *args):
+    """Run func and return (result, workbook parses, seconds)"""
+    before = electron_bridge.workbook_loads
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    return result, electron_bridge.workbook_loads - before, elapsed
+
+
+def unshared_ksb_lookup(module):
+    """The KSB lookup as the bridge first did it: the module's column, then its rows marked 'x',
+    then each KSB code, every step parsing the workbook again"""
+    sheet = electron_bridge.open_workbook()[electron_bridge.otj_xlsx.KSB_SHEET]
+    column = next(col for col in range(3, sheet.max_column + 1)
+                  if module in str(sheet.cell(row=2, column=col).value or ""))
+
+    sheet = electron_bridge.open_workbook()[electron_bridge.otj_xlsx.KSB_SHEET]
+    rows = [row for row in range(1, sheet.max_row + 1) if "x" in str(sheet.cell(row=row, column=column).value or "")]
+
+    for row in rows:
+        electron_bridge.open_workbook()[electron_bridge.otj_xlsx.KSB_SHEET].cell(row=row, column=2).value
+    return len(rows)
+
+
+def bench_workbook_loads(workbook_path):
+    """Compare full workbook parses per submit against every helper loading its own copy"""
+    module = SAMPLE_ENTRY["moduleCode"]
+
+    # Every helper opening the workbook itself (the pre-session behaviour)
+    def unshared_submit():
+        hits = unshared_ksb_lookup(module)
+        electron_bridge.findFirstBlankRow(electron_bridge.open_workbook())
+        electron_bridge.open_workbook()  # Final write
+        return hits
+
+    ksb_hits, unshared_loads, unshared_time = count_loads(unshared_submit)
+
+    result, submit_loads, submit_time = count_loads(electron_bridge.process_form_data, dict(SAMPLE_ENTRY))
+    if not result.get("success"):
+        raise Exception(f"process_data failed: {result.get('error')}")
+
+    return {
+        "module": module,
+        "ksb_hits": ksb_hits,
+        "unshared": {"workbook_loads": unshared_loads, "seconds": round(unshared_time, 3)},
+        "process_data": {"workbook_loads": submit_loads, "seconds": round(submit_time, 3)}
+    }
+
+
+def bench_save(workbook_path):
+    """Time writing one row via the XML row patch against an openpyxl save"""
+    row = electron_bridge.findFirstBlankRow()
+    values = ["02/10/2025", "25/26", "Home", "Lecture", "Not applicable", "Save benchmark", "", "", "", 1.0, "Yes", "N/A"]
+
+    start = time.perf_counter()
+    wb = electron_bridge.open_workbook()
+    wb["OTJ log"].cell(row=row, column=3, value=values[0])
+    loaded = time.perf_counter()
+    wb.save(workbook_path)
+    saved = time.perf_counter()
+
+    electron_bridge.otj_xlsx.patch_rows(workbook_path, "OTJ log", {row + 1: values})
+    patched = time.perf_counter()
+
+    return {
+        "openpyxl": {"load_seconds": round(loaded - start, 3), "save_seconds": round(saved - loaded, 3)},
+        "row_patch_seconds": round(patched - saved, 3)
+    }
+
+
+def parse_importtime(stderr):
+    """Parse -X importtime output.
+
+    Returns ({module: cumulative microseconds} for the top-level imports, and
+    the set of every module imported, nested ones included).
+    """
+    modules = {}
+    imported = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # Header line
+        imported.add(name.strip())
+        if not name.startswith("  "):
+            modules[name.strip()] = int(cumulative)  # Nested imports are already counted by their parent
+    return modules, imported
+
+
+def bench_import_time(scratch_dir):
+    """Start the bridge under -X importtime for commands that never open the workbook"""
+    bridge = os.path.join(PYTHON_DIR, "electron_bridge.py")
+    report = {}
+    runs = {
+        "bare_interpreter": [sys.executable, "-X", "importtime", "-c", "pass"],
+        "get_options": [sys.executable, "-X", "importtime", bridge, "get_options"],
+        "test_connection": [sys.executable, "-X", "importtime", bridge, "test_connection"]
+    }
+    for name, command in runs.items():
+        start = time.perf_counter()
+        completed = subprocess.run(command, cwd=scratch_dir, capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        modules, imported = parse_importtime(completed.stderr)
+        heaviest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:5]
+        report[name] = {
+            "seconds": round(elapsed, 3),
+            "import_ms": round(sum(modules.values()) / 1000, 1),
+            "heaviest_imports_ms": {module: round(us / 1000, 1) for module, us in heaviest},
+            "imports_openpyxl": "openpyxl" in imported
+        }
+    return report
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_WORKBOOK
+    scratch_dir = tempfile.mkdtemp(prefix="otj-bench-")
+    try:
+        workbook_path = os.path.join(scratch_dir, "bench.xlsx")
+        shutil.copyfile(source, workbook_path)
+
+        # Point the bridge at the scratch copy instead of the user's settings
+        settings = {"excelPath": workbook_path, "startingRow": 18, "verboseLogging": False}
+        electron_bridge.load_settings_from_electron = lambda: dict(settings)
+        electron_bridge.path = workbook_path
+
+        report = {
+            "workbook": source,
+            "startup_imports": bench_import_time(scratch_dir),
+            "workbook_loads_per_submit": bench_workbook_loads(workbook_path),
+            "single_row_save": bench_save(workbook_path)
+        }
+        print(json.dumps(report, indent=2))
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for the Python backend
+Generates synthetic OTJ workbooks of increasing size from a template workbook,
+keeping its layout ("OTJ log" entries from row 18, the "Broadcast & Media KSBs"
+matrix, the pivot and lookup sheets), then times find_next_row, getKSB,
+process_data and the CLI writeRow against each one. Prints a JSON report.
+
+Usage: python scripts/benchmark_sizes.py [--sizes 100,1000,5000,10000]
+                                         [--template path/to/workbook.xlsx]
+                                         [--output report.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from copy import copy
+from datetime import date, timedelta
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PYTHON_DIR = os.path.join(REPO_DIR, "python")
+DEFAULT_TEMPLATE = os.path.join(PYTHON_DIR, "OTJ for Python.xlsx")
+DEFAULT_SIZES = [100, 1000, 5000, 10000]
+
+# Backend modules copied into the scratch directory so logs and caches stay there
+BACKEND_FILES = ["electron_bridge.py", "otj_cache.py", "otj_columns.py", "otj_journal.py", "otj_lock.py", "otj_log.py", "otj_options.py", "otj_queue.py", "otj_reports.py", "otj_settings.py", "otj_store.py", "otj_xlsx.py", "OTJ_Automation.py"]
+
+FIRST_LOG_ROW = 18
+SPARE_ROWS = 2000  # Pre-formatted empty rows below the entries, as in the real log
+FIRST_DATE = date(2024, 9, 2)
+
+SAMPLE_ENTRY = {
+    "date": "01/10/2025",
+    "location": "Home",
+    "activityType": "Lecture",
+    "moduleCode": "DIG4143",
+    "description": "Benchmark entry",
+    "details": "Written by scripts/benchmark_sizes.py",
+    "nextSteps": "",
+    "duration": "1.5",
+    "declaration": "Yes"
+}
+
+WORDS = ["signal", "routing", "camera", "audio", "network", "playout", "encoding", "studio",
+         "lighting", "maths", "circuits", "IP", "video", "fault", "monitoring", "testing"]
+
+
+def timed(func, *args):
+    """Run func and return (result, seconds)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, round(time.perf_counter() - start, 4)
+
+
+def prepare_scratch(scratch_dir):
+    """Copy the backend into scratch_dir/python and import the bridge from there"""
+    backend_dir = os.path.join(scratch_dir, "python")
+    os.makedirs(os.path.join(backend_dir, "Backend Files (Hidden)"))
+    for name in BACKEND_FILES:
+        shutil.copyfile(os.path.join(PYTHON_DIR, name), os.path.join(backend_dir, name))
+    # Settings, caches, journal and queue all come from the scratch folder (inherited by the subprocess runs)
+    os.environ["OTJ_SETTINGS_DIR"] = backend_dir
+    os.environ["OTJ_DATA_DIR"] = os.path.join(scratch_dir, "bridge_cache")
+    sys.path.insert(0, backend_dir)
+    import electron_bridge
+    return backend_dir, electron_bridge
+
+
+def write_settings(backend_dir, workbook_path):
+    """Point the scratch bridge at workbook_path"""
+    settings = {"excelPath": workbook_path, "startingRow": FIRST_LOG_ROW, "verboseLogging": False}
+    with open(os.path.join(backend_dir, "electron_settings.json"), 'w') as f:
+        json.dump(settings, f, indent=2)
+
+
+def clear_caches(bridge):
+    """Remove every sidecar cache except the environment marker"""
+    cache_dir = bridge.otj_cache.CACHE_DIR
+    if not os.path.isdir(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        if name != os.path.basename(bridge.ENVIRONMENT_MARKER):
+            os.remove(os.path.join(cache_dir, name))
+
+
+def synthetic_entry(rng, index, entries, options, ksb_index):
+    """Values for columns C-N of one generated log entry"""
+    day = FIRST_DATE + timedelta(days=index * 1000 // max(entries, 1))
+    start_year = day.year % 100 if day.month >= 9 else day.year % 100 - 1
+    module = rng.choice(options["moduleCodes"])
+    ksb = ",".join(ksb_index["modules"].get(module, [])) if module != "Not applicable" else ""
+    words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+    return [
+        day.strftime("%d/%m/%Y"),
+        f"{start_year}/{start_year + 1}",
+        rng.choice(options["locations"]),
+        rng.choice(options["activityTypes"]),
+        module,
+        f"Synthetic entry {index + 1}: {words}",
+        f"Covered {words}",
+        ksb,
+        rng.choice(["", "", "Read up on " + rng.choice(WORDS)]),
+        rng.choice([0.5, 1.0, 1.5, 2.0, 3.0, 7.5]),
+        "Yes",
+        "Not applicable"
+    ]
+
+
+def running_total_formulas(row):
+    """Formulas for columns O and P, as filled down in the real log"""
+    if row == FIRST_LOG_ROW:
+        return ('=IF(OR(ISNUMBER(SEARCH("*Protected Learning*",F{0})),ISNUMBER(SEARCH("*Annual Leave*",F{0}))),0,L{0})'.format(row),
+                '=$G$9-O{0}'.format(row))
+    return ('=IF(ISNUMBER(L{0}), IF(OR(ISNUMBER(SEARCH("*Protected Learning*",F{0})),ISNUMBER(SEARCH("*Annual Leave*",F{0}))),O{1},O{1}+L{0}),"")'.format(row, row - 1),
+            '=IF(ISNUMBER(O{0}),$G$9-O{0},"")'.format(row))
+
+
+def build_workbook(bridge, template, target, entries):
+    """Write a copy of template whose log holds entries synthetic rows plus SPARE_ROWS formatted blanks"""
+    wb = bridge.otj_xlsx.load_workbook(template)
+    sheet = wb[bridge.otj_xlsx.LOG_SHEET]
+    rng = random.Random(entries)
+    options = bridge.otj_options.read_options(template)
+    ksb_index = bridge.build_ksb_index(wb)
+
+    # Every log row is formatted like the first one in the template
+    styles = {col: copy(sheet.cell(row=FIRST_LOG_ROW, column=col)._style) for col in range(2, 18)}
+    template_rows = sheet.max_row
+    last_row = FIRST_LOG_ROW + entries + SPARE_ROWS - 1
+
+    for row in range(FIRST_LOG_ROW, max(last_row, template_rows) + 1):
+        if row > last_row:
+            for col in range(2, 18):
+                sheet.cell(row=row, column=col).value = None
+            continue
+
+        if row > template_rows:
+            for col, style in styles.items():
+                sheet.cell(row=row, column=col)._style = copy(style)
+
+        index = row - FIRST_LOG_ROW
+        if index < entries:
+            values = synthetic_entry(rng, index, entries, options, ksb_index)
+        else:
+            # Blank rows carry the template's default declaration columns
+            values = [None] * 10 + ["Yes", "Not applicable"]
+        for col, value in enumerate(values, start=bridge.otj_xlsx.DATE_COLUMN):
+            sheet.cell(row=row, column=col).value = value
+
+        running_total, remaining = running_total_formulas(row)
+        sheet.cell(row=row, column=15).value = running_total
+        sheet.cell(row=row, column=16).value = remaining
+        sheet.cell(row=row, column=17).value = "Yes"
+
+    wb.save(target)
+
+
+def bench_cli_write_row(backend_dir, workbook_path):
+    """Time OTJ_Automation.writeRow() writing one row to workbook_path"""
+    script = os.path.join(backend_dir, "OTJ_Automation.py")
+    with open(script, 'r', encoding='utf-8') as f:
+        source = f.read().split("## MAIN PROGRAM ##")[0]
+
+    cwd = os.getcwd()
+    try:
+        cli = {"__file__": script, "__name__": "otj_automation_benchmark"}
+        exec(compile(source, script, "exec"), cli)  # Definitions only, without the interactive prompts
+        cli["path"] = workbook_path
+        cli["rowData"] = ["02/10/2025", "25/26", "Home", "Lecture", "Not applicable", "CLI benchmark",
+                          "", "", "", 1.0, "Yes", "Not applicable"]
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, seconds = timed(cli["writeRow"])
+        return {"seconds": seconds, "timings": {phase: round(s, 4) for phase, s in cli["timings"].items()}}
+    finally:
+        os.chdir(cwd)
+
+
+def bench_size(bridge, backend_dir, scratch_dir, template, entries):
+    """Generate one workbook and time each operation against it"""
+    workbook_path = os.path.join(scratch_dir, f"otj-{entries}.xlsx")
+    _, generate_seconds = timed(build_workbook, bridge, template, workbook_path, entries)
+    write_settings(backend_dir, workbook_path)
+    clear_caches(bridge)
+    bridge.path = workbook_path
+
+    report = {
+        "entries": entries,
+        "workbook_bytes": os.path.getsize(workbook_path),
+        "generate_seconds": generate_seconds
+    }
+
+    cold, report_cold = timed(bridge.handle_command, "find_next_row")
+    _, report_warm = timed(bridge.handle_command, "find_next_row")
+    report["find_next_row"] = {"row": cold["row"], "cold_seconds": report_cold, "warm_seconds": report_warm}
+
+    module = SAMPLE_ENTRY["moduleCode"]
+    _, ksb_cold = timed(bridge.getKSB, module)
+    _, ksb_warm = timed(bridge.getKSB, module)
+    report["getKSB"] = {"module": module, "cold_seconds": ksb_cold, "warm_seconds": ksb_warm}
+
+    result, seconds = timed(bridge.handle_command, "process_data", dict(SAMPLE_ENTRY))
+    if not result.get("success"):
+        raise Exception(f"process_data failed for {entries} entries: {result.get('error')}")
+    report["process_data"] = {"row": result["row"], "seconds": seconds, "timings": result["timings"]}
+
+    # A fresh interpreter per submit, as the app does without the resident bridge
+    # A different description, or the bridge would reject it as a duplicate of the entry above
+    entry = dict(SAMPLE_ENTRY, description=SAMPLE_ENTRY["description"] + " (subprocess)")
+    command = [sys.executable, os.path.join(backend_dir, "electron_bridge.py"), "process_data", json.dumps(entry)]
+    start = time.perf_counter()
+    completed = subprocess.run(command, cwd=scratch_dir, capture_output=True, text=True)
+    seconds = round(time.perf_counter() - start, 4)
+    if completed.returncode != 0:
+        raise Exception(f"process_data subprocess failed: {completed.stdout or completed.stderr}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    if not result.get("success"):
+        raise Exception(f"process_data subprocess failed for {entries} entries: {result.get('error')}")
+    report["process_data_subprocess"] = {"row": result["row"], "seconds": seconds, "timings": result["timings"]}
+
+    report["cli_writeRow"] = bench_cli_write_row(backend_dir, workbook_path)
+
+    os.remove(workbook_path)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the Python backend against synthetic workbooks of increasing size")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="comma separated numbers of log entries")
+    parser.add_argument("--template", default=DEFAULT_TEMPLATE, help="workbook whose layout is copied")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    scratch_dir = tempfile.mkdtemp(prefix="otj-sizes-")
+    try:
+        backend_dir, bridge = prepare_scratch(scratch_dir)
+        report = {
+            "template": args.template,
+            "python": sys.version.split()[0],
+            "starting_row": FIRST_LOG_ROW,
+            "sizes": [bench_size(bridge, backend_dir, scratch_dir, args.template, entries) for entries in sizes]
+        }
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
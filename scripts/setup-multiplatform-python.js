@@ -134,11 +134,29 @@ async function configureEmbeddedPython(platformDir) {
   }
 }
 
+// The bridge script and the helper modules it imports
+const BRIDGE_FILES = [
+  'electron_bridge.py',
+  'otj_cache.py',
+  'otj_columns.py',
+  'otj_journal.py',
+  'otj_lock.py',
+  'otj_log.py',
+  'otj_options.py',
+  'otj_queue.py',
+  'otj_reports.py',
+  'otj_settings.py',
+  'otj_store.py',
+  'otj_xlsx.py'
+];
+
 async function copyBridgeScript(platformDir) {
-  const bridgeSource = path.join(__dirname, '..', 'python', 'electron_bridge.py');
-  if (fs.existsSync(bridgeSource)) {
-    const bridgeDest = path.join(platformDir, 'electron_bridge.py');
-    fs.copyFileSync(bridgeSource, bridgeDest);
+  for (const fileName of BRIDGE_FILES) {
+    const bridgeSource = path.join(__dirname, '..', 'python', fileName);
+    if (fs.existsSync(bridgeSource)) {
+      const bridgeDest = path.join(platformDir, fileName);
+      fs.copyFileSync(bridgeSource, bridgeDest);
+    }
   }
 }
 
@@ -21,7 +21,18 @@ const targetDirs = [
 
 const filesToSync = [
     'electron_bridge.py',
-    'OTJ_Automation.py'
+    'OTJ_Automation.py',
+    'otj_cache.py',
+    'otj_columns.py',
+    'otj_journal.py',
+    'otj_lock.py',
+    'otj_log.py',
+    'otj_options.py',
+    'otj_queue.py',
+    'otj_reports.py',
+    'otj_settings.py',
+    'otj_store.py',
+    'otj_xlsx.py'
 ];
 
 function calculateFileHash(filePath) {
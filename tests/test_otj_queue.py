@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Checks that the offline queue (python/otj_queue.py) outlives the install folder
+The Windows installer deletes the install folder on reinstall and app bundles
+are read-only, so queued entries must live in the per-user data folder.
+
+Usage: python -m unittest discover tests
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PYTHON_DIR = os.path.join(REPO_DIR, "python")
+BACKEND_FILES = ["otj_cache.py", "otj_queue.py"]
+
+ENTRY = {"date": "01/10/2025", "description": "Queued while offline"}
+
+ENQUEUE = "import otj_queue, sys, json; otj_queue.enqueue(sys.argv[1], [json.loads(sys.argv[2])])"
+PENDING = "import otj_queue, sys, json; print(json.dumps([entry for _, entry in otj_queue.pending(sys.argv[1])]))"
+
+
+class QueueLocationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scratch = tempfile.mkdtemp(prefix="otj-queue-")
+        self.home = os.path.join(self.scratch, "home")
+        self.workbook = os.path.join(self.scratch, "OneDrive", "OTJ.xlsx")
+        # Every platform's per-user folder points into the scratch folder
+        self.env = dict(os.environ, HOME=self.home, USERPROFILE=self.home,
+                        LOCALAPPDATA=os.path.join(self.home, "AppData", "Local"),
+                        XDG_DATA_HOME=os.path.join(self.home, ".local", "share"))
+        self.env.pop("OTJ_DATA_DIR", None)
+
+    def tearDown(self):
+        shutil.rmtree(self.scratch, ignore_errors=True)
+
+    def install(self, name):
+        """Copy the queue modules into a fresh install folder"""
+        install_dir = os.path.join(self.scratch, name)
+        os.makedirs(install_dir)
+        for file_name in BACKEND_FILES:
+            shutil.copyfile(os.path.join(PYTHON_DIR, file_name), os.path.join(install_dir, file_name))
+        return install_dir
+
+    def run_in(self, install_dir, code, *args):
+        completed = subprocess.run([sys.executable, "-c", code, self.workbook] + list(args), cwd=install_dir,
+                                   env=self.env, capture_output=True, text=True, check=True)
+        return completed.stdout
+
+    def test_queue_survives_reinstall_to_new_path(self):
+        first = self.install("install-1")
+        self.run_in(first, ENQUEUE, json.dumps(ENTRY))
+
+        # Reinstall: the old folder is removed and the app lands somewhere else
+        shutil.rmtree(first)
+        second = self.install("install-2")
+
+        self.assertEqual(json.loads(self.run_in(second, PENDING)), [ENTRY])
+        self.assertFalse(os.path.exists(os.path.join(second, "bridge_cache")))
+
+    def test_queue_left_beside_scripts_is_adopted(self):
+        install_dir = self.install("install")
+        self.run_in(install_dir, ENQUEUE, json.dumps(ENTRY))
+
+        # Move the queue back to where releases before the per-user folder kept it
+        data_dir = os.path.dirname(self.run_in(install_dir, "import otj_queue, sys; print(otj_queue.queue_path(sys.argv[1]))").strip())
+        shutil.move(data_dir, os.path.join(install_dir, "bridge_cache"))
+
+        self.assertEqual(json.loads(self.run_in(install_dir, PENDING)), [ENTRY])
+        self.assertEqual(os.listdir(os.path.join(install_dir, "bridge_cache")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()